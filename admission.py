@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Vastu Vision Admission Control
+Bounds how many requests run an expensive stage (ML, chart render,
+blueprint render) at once and how many may wait for it; the rest are
+turned away with 503 + Retry-After instead of queueing without limit
+"""
+
+import os
+import math
+import time
+import threading
+from contextlib import contextmanager
+from flask import jsonify
+
+ADMISSION_QUEUE = int(os.environ.get('VASTU_ADMISSION_QUEUE', 16))  # waiters per stage
+ADMISSION_WAIT = float(os.environ.get('VASTU_ADMISSION_WAIT', 10))  # seconds before giving up
+
+class Overloaded(Exception):
+    """A stage is at capacity; the client should retry after `retry_after` seconds"""
+
+    def __init__(self, stage, retry_after=1, message=None):
+        super().__init__(message or f"{stage} is at capacity, please retry")
+        self.stage = stage
+        self.retry_after = max(1, int(math.ceil(retry_after)))
+
+class AdmissionGate:
+    """At most max_concurrent holders plus max_waiting blocked callers"""
+
+    def __init__(self, stage, max_concurrent, max_waiting=ADMISSION_QUEUE, wait_timeout=ADMISSION_WAIT):
+        self.stage = stage
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self.slots = threading.BoundedSemaphore(self.max_concurrent)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.avg_hold = 0.0  # EWMA of seconds a slot is held, for Retry-After
+
+    def retry_after(self):
+        # Time for the current queue to drain through the available slots
+        return self.avg_hold * (self.waiting + 1) / self.max_concurrent
+
+    def acquire(self, timeout=None):
+        wait = self.wait_timeout if timeout is None else min(self.wait_timeout, max(0.0, timeout))
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                if self.waiting >= self.max_waiting:
+                    self.rejected += 1
+                    raise Overloaded(self.stage, self.retry_after())
+                self.waiting += 1
+                self.peak_waiting = max(self.peak_waiting, self.waiting)
+            acquired = self.slots.acquire(timeout=wait)
+            with self.lock:
+                self.waiting -= 1
+                if not acquired:
+                    self.timed_out += 1
+                    raise Overloaded(self.stage, self.retry_after())
+        with self.lock:
+            self.active += 1
+            self.admitted += 1
+
+    def release(self, held):
+        with self.lock:
+            self.active -= 1
+            self.avg_hold = 0.8 * self.avg_hold + 0.2 * held if self.avg_hold else held
+        self.slots.release()
+
+    @contextmanager
+    def admit(self, timeout=None):
+        """Hold one slot of this stage; raises Overloaded when the wait queue is full
+        or no slot frees up within timeout (capped at wait_timeout)"""
+        self.acquire(timeout)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(time.perf_counter() - start)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'max_concurrent': self.max_concurrent,
+                'max_waiting': self.max_waiting,
+                'active': self.active,
+                'waiting': self.waiting,
+                'peak_waiting': self.peak_waiting,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out,
+                'avg_hold_ms': round(self.avg_hold * 1000, 1)
+            }
+
+def overloaded_response(error):
+    """Flask error handler: 503 with Retry-After for an Overloaded stage"""
+    response = jsonify({
+        'success': False,
+        'error': str(error),
+        'stage': error.stage,
+        'retry_after': error.retry_after
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
@@ -4,21 +4,52 @@ Vastu Image Analysis Backend
 Analyzes uploaded floor plan images and generates 2D visualization
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, url_for
 from flask_cors import CORS
 import matplotlib
 matplotlib.use('Agg')
-import matplotlib.pyplot as plt
 import numpy as np
 import io
 import base64
 import json
+import sys
 from pathlib import Path
 import cv2
 from PIL import Image
 
+sys.path.insert(0, str(Path(__file__).parent / 'ml_model'))
+from model_server import ModelClient
+from render_cache import RenderCache, wants_inline_images
+from chart_renderer import render_chart, chart_spec, RENDER_MODES
+from render_pool import RenderPool
+from admission import AdmissionGate, Overloaded, overloaded_response
+from image_encoding import IMAGE_FORMAT
+
 app = Flask(__name__)
 CORS(app)
+app.register_error_handler(Overloaded, overloaded_response)
+
+# Rendered 5-elements charts keyed by (elements, vastu_score, variant)
+CHART_VARIANT = 'image'
+chart_cache = RenderCache()
+CHART_TITLE = '5 Elements Analysis (Image Upload)'
+
+# Chart renders run in worker processes (VASTU_RENDER_WORKERS, 0 = in-process)
+render_pool = RenderPool()
+# Chart renders beyond the pool's workers wait here (bounded) or get a 503
+chart_gate = AdmissionGate('chart_render', max_concurrent=render_pool.workers)
+
+# Shared model server (ml_model/model_server.py), used when it is running on this host
+model_client = ModelClient(timeout=5)
+
+def predict_ml_score(image_features):
+    """Score image features with the shared model server, or simulate if it is not running"""
+    if model_client.available():
+        try:
+            return model_client.predict(image_features)['vastu_score']
+        except Exception as e:
+            print(f"⚠️ Model server error: {e}")
+    return 70 + np.random.randint(-10, 20)  # Simulate ML prediction
 
 def analyze_image_features(image_data):
     """
@@ -116,59 +147,35 @@ def calculate_5_elements_from_image(image_features):
     return elements
 
 def generate_2d_visualization(elements, vastu_score):
-    """Generate 2D matplotlib visualization"""
-    
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
-    fig.patch.set_facecolor('#FFF8E7')
-    
-    # Bar Chart
-    element_names = list(elements.keys())
-    element_values = list(elements.values())
-    colors = ['#E07A5F', '#2A9D8F', '#EAD7C0', '#E9C46A', '#264653']
-    
-    bars = ax1.bar(element_names, element_values, color=colors, edgecolor='black', linewidth=1.5)
-    
-    for bar, value in zip(bars, element_values):
-        height = bar.get_height()
-        ax1.text(bar.get_x() + bar.get_width()/2., height,
-                f'{value:.1f}%',
-                ha='center', va='bottom', fontsize=11, fontweight='bold')
-    
-    ax1.set_ylabel('Score (%)', fontsize=12, fontweight='bold')
-    ax1.set_title('5 Elements Analysis (Image Upload)', fontsize=14, fontweight='bold', pad=20)
-    ax1.set_ylim(0, 110)
-    ax1.grid(axis='y', alpha=0.3, linestyle='--')
-    ax1.set_facecolor('#FFFFFF')
-    ax1.axhline(y=70, color='green', linestyle='--', linewidth=1, alpha=0.5, label='Good Threshold')
-    ax1.legend(loc='upper right')
-    
-    # Radar Chart
-    angles = np.linspace(0, 2 * np.pi, len(element_names), endpoint=False).tolist()
-    element_values_radar = element_values + [element_values[0]]
-    angles += angles[:1]
-    
-    ax2 = plt.subplot(122, projection='polar')
-    ax2.plot(angles, element_values_radar, 'o-', linewidth=2, color='#F4A261')
-    ax2.fill(angles, element_values_radar, alpha=0.25, color='#F4A261')
-    ax2.set_xticks(angles[:-1])
-    ax2.set_xticklabels(element_names, fontsize=10, fontweight='bold')
-    ax2.set_ylim(0, 100)
-    ax2.set_title(f'Vastu Score: {vastu_score:.1f}%', 
-                  fontsize=14, fontweight='bold', pad=20, color='#2A9D8F')
-    ax2.grid(True, alpha=0.3)
-    ax2.set_facecolor('#FFFFFF')
-    ax2.set_yticks([25, 50, 75, 100])
-    ax2.set_yticklabels(['25%', '50%', '75%', '100%'], fontsize=8)
-    
-    plt.tight_layout()
-    
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', dpi=150, bbox_inches='tight', facecolor='#FFF8E7')
-    buf.seek(0)
-    plt.close()
-    
-    img_base64 = base64.b64encode(buf.read()).decode('utf-8')
-    return img_base64
+    """Render the 2D visualization into chart_cache, reusing cached renders; returns (image id, PNG)"""
+    image_id = chart_cache.make_key(elements, round(vastu_score, 1), CHART_VARIANT, IMAGE_FORMAT)
+    png = chart_cache.get_or_render_key(image_id, lambda: render_2d_visualization(elements, vastu_score))
+    return image_id, png
+
+def visualization_fields(image_id, png, inline):
+    """Response fields for a rendered chart: a URL, plus base64 only when inline was requested"""
+    fields = {
+        'visualization_id': image_id,
+        'visualization_url': url_for('get_image', image_id=image_id),
+        'visualization': None
+    }
+    if inline:
+        fields['visualization'] = base64.b64encode(png).decode('utf-8')
+    return fields
+
+def build_visualization(render_mode, elements, vastu_score, inline):
+    """Visualization response fields for the requested render mode; 'spec' and 'none' skip matplotlib"""
+    if render_mode == 'none':
+        return {'visualization': None}
+    if render_mode == 'spec':
+        return {'visualization': None, 'visualization_spec': chart_spec(CHART_TITLE, elements, vastu_score)}
+    image_id, png = generate_2d_visualization(elements, vastu_score)
+    return visualization_fields(image_id, png, inline)
+
+def render_2d_visualization(elements, vastu_score):
+    """Render 2D matplotlib visualization to PNG bytes"""
+    with chart_gate.admit():
+        return render_pool.render(render_chart, CHART_TITLE, elements, vastu_score)
 
 @app.route('/analyze_image', methods=['POST', 'OPTIONS'])
 def analyze_image():
@@ -180,6 +187,13 @@ def analyze_image():
         data = request.get_json()
         print("📷 Received image analysis request")
         
+        render_mode = str(data.get('render') or request.args.get('render', 'png')).lower()
+        if render_mode not in RENDER_MODES:
+            return jsonify({
+                'success': False,
+                'error': f"render must be one of: {', '.join(RENDER_MODES)}"
+            }), 400
+        
         # Get image data
         image_data = data.get('image', '')
         filename = data.get('filename', 'floor_plan.png')
@@ -197,8 +211,8 @@ def analyze_image():
         elements = calculate_5_elements_from_image(image_features)
         print(f"🔥 Elements calculated: {elements}")
         
-        # Calculate ML score (simplified - using image features)
-        ml_score = 70 + np.random.randint(-10, 20)  # Simulate ML prediction
+        # Calculate ML score from image features
+        ml_score = predict_ml_score(image_features)
         
         # Calculate rule-based score
         rule_score = sum(elements.values()) / len(elements)
@@ -208,10 +222,9 @@ def analyze_image():
         
         print(f"📊 Vastu Score: {vastu_score}% (ML: {ml_score}, Rules: {rule_score:.1f})")
         
-        # Generate 2D visualization
-        print("🎨 Generating 2D visualization...")
-        visualization_base64 = generate_2d_visualization(elements, vastu_score)
-        print("✅ Visualization generated!")
+        # Generate 2D visualization (or its spec) unless the client opted out
+        print(f"🎨 Visualization: {render_mode}")
+        visualization = build_visualization(render_mode, elements, vastu_score, wants_inline_images(data))
         
         # Generate recommendations
         recommendations = []
@@ -262,7 +275,7 @@ def analyze_image():
             'ml_score': ml_score,
             'rule_score': round(rule_score, 1),
             'elements': elements,
-            'visualization': visualization_base64,
+            **visualization,
             'recommendations': recommendations,
             'image_analysis': {
                 'filename': filename,
@@ -274,6 +287,8 @@ def analyze_image():
         print("✅ Image analysis complete!")
         return jsonify(response)
         
+    except Overloaded:
+        raise  # answered with 503 + Retry-After by overloaded_response
     except Exception as e:
         print(f"❌ Error: {str(e)}")
         import traceback
@@ -300,16 +315,27 @@ def analyze_image():
             }]
         }), 500
 
+@app.route('/images/<image_id>', methods=['GET'])
+def get_image(image_id):
+    """Serve a rendered visualization as raw PNG"""
+    return chart_cache.image_response(image_id)
+
 @app.route('/health', methods=['GET'])
 def health():
     """Health check"""
     return jsonify({
         'status': 'ok',
         'service': 'image_analysis',
-        'visualization': 'matplotlib ready'
+        'model_server': 'connected' if model_client.available() else 'not running',
+        'visualization': 'matplotlib ready',
+        'chart_cache': chart_cache.stats(),
+        'render_pool': render_pool.stats(),
+        'admission': {'chart_render': chart_gate.stats()}
     })
 
 if __name__ == '__main__':
+    # Start render workers (they import this module, so nothing here runs in them)
+    render_pool.start()
     print("=" * 60)
     print("📷 VASTU VISION - IMAGE ANALYSIS SERVER")
     print("=" * 60)
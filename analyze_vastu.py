@@ -4,24 +4,153 @@ Vastu Analysis Backend - Python Flask Server
 Integrates ML model with frontend and generates 2D visualization
 """
 
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, url_for
 from flask_cors import CORS
 import sys
 import json
-import subprocess
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
 import numpy as np
 from pathlib import Path
-import io
 import base64
 
+from render_cache import RenderCache, wants_inline_images
+from chart_renderer import render_chart, chart_spec, RENDER_MODES
+from render_pool import RenderPool, RENDER_TIMEOUT
+from admission import AdmissionGate, Overloaded, overloaded_response
+from single_flight import SingleFlight, coalesce
+from deadline import Deadline
+from image_encoding import IMAGE_FORMAT
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
+app.register_error_handler(Overloaded, overloaded_response)
+
+# Identical concurrent requests share one computation
+request_flight = SingleFlight()
+
+# Rendered 5-elements charts keyed by (elements, vastu_score, variant)
+CHART_VARIANT = 'space'
+chart_cache = RenderCache()
+CHART_TITLE = '5 Elements Analysis'
+
+# Chart renders run in worker processes (VASTU_RENDER_WORKERS, 0 = in-process)
+render_pool = RenderPool()
+# Chart renders beyond the pool's workers wait here (bounded) or get a 503
+chart_gate = AdmissionGate('chart_render', max_concurrent=render_pool.workers)
 
 # ML Model Path
-ML_MODEL_PATH = Path(__file__).parent / 'ml_model' / 'predict.py'
+ML_MODEL_DIR = Path(__file__).parent / 'ml_model'
+sys.path.insert(0, str(ML_MODEL_DIR))
+from model_registry import ModelWatcher
+from model_server import ModelClient
+from shadow import create_shadow_evaluator
+
+ML_TIMEOUT = 5  # seconds per prediction
+ML_MIN_BUDGET = 0.01  # seconds; with less left, /analyze uses the mock prediction
+RENDER_MIN_BUDGET = 0.5  # seconds; with less left, only a cached chart is returned
+
+# The model is loaded once (at startup under __main__, else on first use) and
+# kept in memory for all requests. The watcher (started under __main__)
+# hot-swaps it when the model registry's `current` pointer changes. It is not
+# built at import: render workers import this module and never predict.
+model_watcher = None
+model_watcher_lock = threading.Lock()
+ML_WORKERS = 4
+ml_executor = ThreadPoolExecutor(max_workers=ML_WORKERS, thread_name_prefix='ml')
+ml_gate = AdmissionGate('ml', max_concurrent=ML_WORKERS)
+
+# Shared model server (ml_model/model_server.py), used when it is running on this host
+model_client = ModelClient(timeout=ML_TIMEOUT)
+
+# Candidate model scored in the background when $VASTU_SHADOW_MODEL is set
+# (created under __main__, since render workers import this module too)
+shadow_evaluator = None
+
+def predict_features_batch(predictor, ml_inputs):
+    """Score a batch via the shared model server, or the in-process model if it is not running"""
+    if model_client.available():
+        try:
+            return model_client.predict_batch(ml_inputs)
+        except Exception as e:
+            print(f"⚠️ Model server error: {e}, using in-process model")
+    return predictor.predict_batch(ml_inputs)
+
+def get_model_watcher():
+    """The watcher holding the serving model, loading the model on first call"""
+    global model_watcher
+    if model_watcher is None:
+        with model_watcher_lock:
+            if model_watcher is None:
+                model_watcher = ModelWatcher(fallback_model_path=ML_MODEL_DIR / 'vastu_ml_model.pkl')
+    return model_watcher
+
+def serving_model():
+    """(version, prediction cache stats, where) of the model answering predictions:
+    the model server's when it is running, else the in-process one"""
+    if model_client.available():
+        try:
+            stats = model_client.stats()
+            return stats['model_version'], stats['prediction_cache'], 'model_server'
+        except Exception as e:
+            print(f"⚠️ Model server error: {e}, reporting in-process model")
+    predictor = get_model_watcher().predictor
+    return predictor.version, predictor.cache.stats(), 'in_process'
+
+def run_ml_batch_prediction(ml_inputs, timeout=ML_TIMEOUT, deadline=None):
+    """Score many ML inputs in one vectorized call, falling back to mock predictions.
+    With a deadline the call is limited to the remaining budget and fallbacks are recorded."""
+    predictor = get_model_watcher().predictor
+    if deadline is not None:
+        timeout = min(timeout, deadline.remaining())
+        if timeout < ML_MIN_BUDGET:
+            deadline.degrade('ml', 'skipped, budget spent')
+            return [predictor.get_mock_prediction(ml_input) for ml_input in ml_inputs]
+    
+    start = time.perf_counter()
+    try:
+        ml_gate.acquire(timeout if deadline is not None else None)
+    except Overloaded:
+        if deadline is None:
+            raise
+        # No ML slot within the budget: answer with the fallback score rather than a 503
+        deadline.degrade('ml', 'at capacity')
+        return [predictor.get_mock_prediction(ml_input) for ml_input in ml_inputs]
+    
+    admitted = time.perf_counter()
+    try:
+        if deadline is not None:
+            # The wait for a slot came out of the same budget
+            timeout = min(timeout, deadline.remaining())
+            if timeout < ML_MIN_BUDGET:
+                deadline.degrade('ml', 'skipped, budget spent')
+                return [predictor.get_mock_prediction(ml_input) for ml_input in ml_inputs]
+        future = ml_executor.submit(predict_features_batch, predictor, ml_inputs)
+        try:
+            results = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            print(f"⚠️ ML batch timed out after {timeout:.2f}s, using fallback")
+            if deadline is not None:
+                deadline.degrade('ml', 'timed out')
+            return [predictor.get_mock_prediction(ml_input) for ml_input in ml_inputs]
+        except Exception as e:
+            print(f"⚠️ ML batch error: {e}")
+            if deadline is not None:
+                deadline.degrade('ml', 'model error')
+            return [predictor.get_mock_prediction(ml_input) for ml_input in ml_inputs]
+    finally:
+        ml_gate.release(time.perf_counter() - admitted)
+    
+    if deadline is not None and results and results[0].get('model_type') == 'Mock':
+        deadline.degrade('ml', 'model unavailable')
+    
+    # Compare against the candidate model without waiting for it
+    if shadow_evaluator is not None and results and results[0].get('model_type') != 'Mock':
+        shadow_evaluator.submit(ml_inputs, results, (time.perf_counter() - start) * 1000)
+    return results
 
 def encode_orientation(orientation):
     """Encode orientation to number"""
@@ -165,73 +294,168 @@ def calculate_5_elements(space_data):
     
     return elements
 
-def generate_2d_visualization(elements, vastu_score):
-    """Generate 2D matplotlib visualization of 5 elements"""
-    
-    # Create figure with better styling
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
-    fig.patch.set_facecolor('#FFF8E7')
-    
-    # --- LEFT PLOT: Bar Chart of 5 Elements ---
-    element_names = list(elements.keys())
-    element_values = list(elements.values())
-    
-    # Define colors for each element (Vastu-themed)
-    colors = ['#E07A5F', '#2A9D8F', '#EAD7C0', '#E9C46A', '#264653']
-    
-    bars = ax1.bar(element_names, element_values, color=colors, edgecolor='black', linewidth=1.5)
-    
-    # Add value labels on bars
-    for bar, value in zip(bars, element_values):
-        height = bar.get_height()
-        ax1.text(bar.get_x() + bar.get_width()/2., height,
-                f'{value:.1f}%',
-                ha='center', va='bottom', fontsize=11, fontweight='bold')
-    
-    ax1.set_ylabel('Score (%)', fontsize=12, fontweight='bold')
-    ax1.set_title('5 Elements Analysis', fontsize=14, fontweight='bold', pad=20)
-    ax1.set_ylim(0, 110)
-    ax1.grid(axis='y', alpha=0.3, linestyle='--')
-    ax1.set_facecolor('#FFFFFF')
-    
-    # Add horizontal line at 70% (good threshold)
-    ax1.axhline(y=70, color='green', linestyle='--', linewidth=1, alpha=0.5, label='Good Threshold')
-    ax1.legend(loc='upper right')
-    
-    # --- RIGHT PLOT: Radar Chart of 5 Elements ---
-    angles = np.linspace(0, 2 * np.pi, len(element_names), endpoint=False).tolist()
-    element_values_radar = element_values + [element_values[0]]  # Close the circle
-    angles += angles[:1]
+def parse_plot_area(plot_size):
+    """Parse plot area in sq ft from a string like '1200 sq ft'"""
+    plot_area = 1200
+    try:
+        plot_area = int(''.join(filter(str.isdigit, plot_size)))
+    except:
+        pass
+    return plot_area
+
+def build_ml_input(space_data, room=None):
+    """Build the ML feature dict for a space request, for one room or the first room"""
+    room_type = space_data.get('roomType', '2bhk')
+    orientation = space_data.get('orientation', 'north-facing')
+    floor_number = int(space_data.get('floorNumber', 1))
+    rooms = space_data.get('rooms', [])
     
-    ax2 = plt.subplot(122, projection='polar')
-    ax2.plot(angles, element_values_radar, 'o-', linewidth=2, color='#F4A261')
-    ax2.fill(angles, element_values_radar, alpha=0.25, color='#F4A261')
-    ax2.set_xticks(angles[:-1])
-    ax2.set_xticklabels(element_names, fontsize=10, fontweight='bold')
-    ax2.set_ylim(0, 100)
-    ax2.set_title(f'Vastu Score: {vastu_score:.1f}%', 
-                  fontsize=14, fontweight='bold', pad=20, color='#2A9D8F')
-    ax2.grid(True, alpha=0.3)
-    ax2.set_facecolor('#FFFFFF')
+    plot_area = parse_plot_area(space_data.get('plotSize', '1200 sq ft'))
+    plot_width = int(plot_area ** 0.5)
+    plot_height = plot_area // plot_width
     
-    # Add score ranges
-    ax2.set_yticks([25, 50, 75, 100])
-    ax2.set_yticklabels(['25%', '50%', '75%', '100%'], fontsize=8)
+    if room is None:
+        room = rooms[0] if rooms else {}
     
-    plt.tight_layout()
+    return {
+        'plot_width': plot_width,
+        'plot_height': plot_height,
+        'plot_area': plot_area,
+        'floor_num': floor_number,
+        'zone_encoded': encode_zone(room.get('zone', 'center')),
+        'orientation_encoded': encode_orientation(orientation),
+        'room_type_encoded': encode_room_type(room_type),
+        'adjacent_count': len(rooms),
+        'shared_walls_count': max(1, len(rooms) - 1)
+    }
+
+def build_room_ml_inputs(space_data):
+    """Build one ML feature dict per room (one for the whole space if it has no rooms)"""
+    rooms = space_data.get('rooms', [])
+    if not rooms:
+        return [build_ml_input(space_data)]
+    return [build_ml_input(space_data, room) for room in rooms]
+
+def aggregate_room_scores(space_data, ml_results):
+    """Average per-room ML scores and list them alongside each room"""
+    rooms = space_data.get('rooms', [])
+    room_scores = [{
+        'name': room.get('name', ''),
+        'zone': room.get('zone', ''),
+        'ml_score': ml_result.get('vastu_score', 75)
+    } for room, ml_result in zip(rooms, ml_results)]
     
-    # Save to bytes buffer
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', dpi=150, bbox_inches='tight', facecolor='#FFF8E7')
-    buf.seek(0)
-    plt.close()
+    scores = [ml_result.get('vastu_score', 75) for ml_result in ml_results]
+    ml_score = round(sum(scores) / len(scores), 1) if scores else 75
+    return ml_score, room_scores
+
+def generate_recommendations(elements, vastu_score):
+    """Generate recommendations for weak elements"""
+    recommendations = []
+    for element, score in elements.items():
+        if score < 70:
+            if element == 'Fire':
+                recommendations.append({
+                    'element': element,
+                    'score': score,
+                    'message': 'Consider placing kitchen in Southeast direction for better fire element balance'
+                })
+            elif element == 'Water':
+                recommendations.append({
+                    'element': element,
+                    'score': score,
+                    'message': 'Water sources (bathroom, well) should be in Northeast for optimal water element'
+                })
+            elif element == 'Earth':
+                recommendations.append({
+                    'element': element,
+                    'score': score,
+                    'message': 'Master bedroom in Southwest enhances earth element and stability'
+                })
+            elif element == 'Air':
+                recommendations.append({
+                    'element': element,
+                    'score': score,
+                    'message': 'Living room in Northwest improves air circulation and social energy'
+                })
+            elif element == 'Space':
+                recommendations.append({
+                    'element': element,
+                    'score': score,
+                    'message': 'Keep center of house open or use as courtyard for better space element'
+                })
     
-    # Convert to base64 for JSON response
-    img_base64 = base64.b64encode(buf.read()).decode('utf-8')
+    if not recommendations:
+        recommendations.append({
+            'element': 'Overall',
+            'score': vastu_score,
+            'message': 'Excellent Vastu compliance! Your space has good energy balance.'
+        })
     
-    return img_base64
+    return recommendations
+
+def chart_key(elements, vastu_score):
+    return chart_cache.make_key(elements, round(vastu_score, 1), CHART_VARIANT, IMAGE_FORMAT)
+
+def generate_2d_visualization(elements, vastu_score, deadline=None):
+    """Render the 2D visualization into chart_cache, reusing cached renders; returns (image id, PNG)"""
+    image_id = chart_key(elements, vastu_score)
+    png = chart_cache.get_or_render_key(image_id, lambda: render_2d_visualization(elements, vastu_score, deadline))
+    return image_id, png
+
+def visualization_fields(image_id, png, inline):
+    """Response fields for a rendered chart: a URL, plus base64 only when inline was requested"""
+    fields = {
+        'visualization_id': image_id,
+        'visualization_url': url_for('get_image', image_id=image_id),
+        'visualization': None
+    }
+    if inline:
+        fields['visualization'] = base64.b64encode(png).decode('utf-8')
+    return fields
+
+def build_visualization(render_mode, elements, vastu_score, inline, deadline=None):
+    """Visualization response fields for the requested render mode; 'spec' and 'none' skip matplotlib.
+    Under a deadline the chart is only rendered if the budget allows, otherwise served from cache or skipped."""
+    if render_mode == 'none':
+        return {'visualization': None}
+    if render_mode == 'spec':
+        return {'visualization': None, 'visualization_spec': chart_spec(CHART_TITLE, elements, vastu_score)}
+
+    if deadline is not None and deadline.remaining() < RENDER_MIN_BUDGET:
+        image_id = chart_key(elements, vastu_score)
+        png = chart_cache.get(image_id)
+        if png is None:
+            deadline.degrade('visualization', 'skipped, budget spent')
+            return {'visualization': None}
+        return visualization_fields(image_id, png, inline)
+
+    try:
+        image_id, png = generate_2d_visualization(elements, vastu_score, deadline)
+    except (FutureTimeoutError, Overloaded) as e:
+        if deadline is None:
+            raise
+        deadline.degrade('visualization', 'render timed out' if isinstance(e, FutureTimeoutError) else 'render busy')
+        return {'visualization': None}
+    return visualization_fields(image_id, png, inline)
+
+def render_2d_visualization(elements, vastu_score, deadline=None):
+    """Render 2D matplotlib visualization of 5 elements to PNG bytes"""
+    with chart_gate.admit(timeout=deadline.remaining() if deadline else None):
+        future = render_pool.submit(render_chart, CHART_TITLE, elements, vastu_score)
+        try:
+            return future.result(timeout=deadline.remaining() if deadline else RENDER_TIMEOUT)
+        except FutureTimeoutError:
+            # Let the render finish in the background so a retry is a cache hit
+            image_id = chart_key(elements, vastu_score)
+            def cache_late_render(done):
+                if done.exception() is None:
+                    chart_cache.put(image_id, done.result())
+            future.add_done_callback(cache_late_render)
+            raise
 
 @app.route('/analyze', methods=['POST', 'OPTIONS'])
+@coalesce(request_flight)
 def analyze():
     """Analyze space details with ML model and generate visualization"""
     if request.method == 'OPTIONS':
@@ -241,6 +465,16 @@ def analyze():
         data = request.get_json()
         print(f"📊 Received analysis request: {json.dumps(data, indent=2)}")
         
+        render_mode = str(data.get('render') or request.args.get('render', 'png')).lower()
+        if render_mode not in RENDER_MODES:
+            return jsonify({
+                'success': False,
+                'error': f"render must be one of: {', '.join(RENDER_MODES)}"
+            }), 400
+        
+        # Time budget shared by the ML and render stages
+        deadline = Deadline.from_request(data)
+        
         # Extract space details
         plot_size = data.get('plotSize', '1200 sq ft')
         room_type = data.get('roomType', '2bhk')
@@ -248,51 +482,15 @@ def analyze():
         floor_number = int(data.get('floorNumber', 1))
         rooms = data.get('rooms', [])
         
-        # Parse plot size
-        plot_area = 1200
-        try:
-            plot_area = int(''.join(filter(str.isdigit, plot_size)))
-        except:
-            pass
+        # Prepare ML input: one row per room
+        ml_inputs = build_room_ml_inputs(data)
         
-        plot_width = int(plot_area ** 0.5)
-        plot_height = plot_area // plot_width
+        print(f"🤖 ML Input ({len(ml_inputs)} rows): {json.dumps(ml_inputs[0], indent=2)}")
         
-        # Prepare ML input
-        ml_input = {
-            'plot_width': plot_width,
-            'plot_height': plot_height,
-            'plot_area': plot_area,
-            'floor_num': floor_number,
-            'zone_encoded': encode_zone(rooms[0].get('zone', 'center') if rooms else 'center'),
-            'orientation_encoded': encode_orientation(orientation),
-            'room_type_encoded': encode_room_type(room_type),
-            'adjacent_count': len(rooms),
-            'shared_walls_count': max(1, len(rooms) - 1)
-        }
-        
-        print(f"🤖 ML Input: {json.dumps(ml_input, indent=2)}")
-        
-        # Call ML model
-        ml_score = 75  # Default
-        try:
-            ml_input_json = json.dumps(ml_input)
-            result = subprocess.run(
-                ['python', str(ML_MODEL_PATH)],
-                input=ml_input_json,
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            
-            if result.returncode == 0:
-                ml_result = json.loads(result.stdout)
-                ml_score = ml_result.get('vastu_score', 75)
-                print(f"✅ ML Model Score: {ml_score}")
-            else:
-                print(f"⚠️ ML Model error: {result.stderr}")
-        except Exception as e:
-            print(f"⚠️ ML Error: {e}")
+        # Call ML model once for all rooms
+        ml_results = run_ml_batch_prediction(ml_inputs, deadline=deadline)
+        ml_score, room_scores = aggregate_room_scores(data, ml_results)
+        print(f"✅ ML Model Score: {ml_score} (average of {len(ml_results)}, {ml_results[0].get('model_type')})")
         
         # Calculate 5 elements using Vastu rules
         elements = calculate_5_elements(data)
@@ -305,61 +503,23 @@ def analyze():
         
         print(f"📊 Final Vastu Score: {vastu_score}% (ML: {ml_score}, Rules: {rule_score:.1f})")
         
-        # Generate 2D visualization
-        print("🎨 Generating 2D visualization...")
-        visualization_base64 = generate_2d_visualization(elements, vastu_score)
-        print("✅ Visualization generated!")
+        # Generate 2D visualization (or its spec) unless the client opted out
+        print(f"🎨 Visualization: {render_mode}")
+        visualization = build_visualization(render_mode, elements, vastu_score, wants_inline_images(data),
+                                            deadline)
         
         # Generate recommendations
-        recommendations = []
-        for element, score in elements.items():
-            if score < 70:
-                if element == 'Fire':
-                    recommendations.append({
-                        'element': element,
-                        'score': score,
-                        'message': 'Consider placing kitchen in Southeast direction for better fire element balance'
-                    })
-                elif element == 'Water':
-                    recommendations.append({
-                        'element': element,
-                        'score': score,
-                        'message': 'Water sources (bathroom, well) should be in Northeast for optimal water element'
-                    })
-                elif element == 'Earth':
-                    recommendations.append({
-                        'element': element,
-                        'score': score,
-                        'message': 'Master bedroom in Southwest enhances earth element and stability'
-                    })
-                elif element == 'Air':
-                    recommendations.append({
-                        'element': element,
-                        'score': score,
-                        'message': 'Living room in Northwest improves air circulation and social energy'
-                    })
-                elif element == 'Space':
-                    recommendations.append({
-                        'element': element,
-                        'score': score,
-                        'message': 'Keep center of house open or use as courtyard for better space element'
-                    })
-        
-        if not recommendations:
-            recommendations.append({
-                'element': 'Overall',
-                'score': vastu_score,
-                'message': 'Excellent Vastu compliance! Your space has good energy balance.'
-            })
+        recommendations = generate_recommendations(elements, vastu_score)
         
         # Return complete analysis
         response = {
             'success': True,
             'vastu_score': vastu_score,
             'ml_score': ml_score,
+            'room_scores': room_scores,
             'rule_score': round(rule_score, 1),
             'elements': elements,
-            'visualization': visualization_base64,  # Base64 encoded PNG
+            **visualization,
             'recommendations': recommendations,
             'space_details': {
                 'plot_size': plot_size,
@@ -367,12 +527,15 @@ def analyze():
                 'orientation': orientation,
                 'floor_number': floor_number,
                 'rooms_count': len(rooms)
-            }
+            },
+            **deadline.report()
         }
         
         print("✅ Analysis complete! Sending response...")
         return jsonify(response)
         
+    except Overloaded:
+        raise  # answered with 503 + Retry-After by overloaded_response
     except Exception as e:
         print(f"❌ Error: {str(e)}")
         import traceback
@@ -400,20 +563,99 @@ def analyze():
             }]
         }), 500
 
+@app.route('/analyze_batch', methods=['POST', 'OPTIONS'])
+def analyze_batch():
+    """Score many spaces at once with a single vectorized ML call (no visualization)"""
+    if request.method == 'OPTIONS':
+        return '', 200
+    
+    try:
+        data = request.get_json()
+        items = data.get('items', []) if isinstance(data, dict) else data
+        print(f"📦 Received batch analysis request: {len(items)} items")
+        
+        # Score every room of every item in one (N, 9) model call
+        item_ml_inputs = [build_room_ml_inputs(item) for item in items]
+        ml_results = run_ml_batch_prediction([row for rows in item_ml_inputs for row in rows])
+        
+        results = []
+        offset = 0
+        for item, rows in zip(items, item_ml_inputs):
+            ml_score, room_scores = aggregate_room_scores(item, ml_results[offset:offset + len(rows)])
+            offset += len(rows)
+            elements = calculate_5_elements(item)
+            rule_score = sum(elements.values()) / len(elements)
+            vastu_score = round((ml_score * 0.4) + (rule_score * 0.6), 1)
+            
+            results.append({
+                'id': item.get('id'),
+                'vastu_score': vastu_score,
+                'ml_score': ml_score,
+                'room_scores': room_scores,
+                'rule_score': round(rule_score, 1),
+                'elements': elements,
+                'recommendations': generate_recommendations(elements, vastu_score)
+            })
+        
+        print(f"✅ Batch analysis complete: {len(results)} items")
+        return jsonify({
+            'success': True,
+            'count': len(results),
+            'results': results
+        })
+        
+    except Overloaded:
+        raise  # answered with 503 + Retry-After by overloaded_response
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'results': []
+        }), 500
+
+@app.route('/images/<image_id>', methods=['GET'])
+def get_image(image_id):
+    """Serve a rendered visualization as raw PNG"""
+    return chart_cache.image_response(image_id)
+
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
+    model_version, prediction_cache, served_by = serving_model()
+    predictor = get_model_watcher().predictor
     return jsonify({
         'status': 'ok',
-        'ml_model': 'loaded',
-        'visualization': 'matplotlib ready'
+        'ml_model': 'loaded' if predictor.is_loaded() else 'mock',
+        'model_version': model_version,
+        'model_served_by': served_by,
+        'in_process_model_version': predictor.version,
+        'prediction_cache': prediction_cache,
+        'lookup_grid': predictor.lookup_grid.stats() if predictor.lookup_grid is not None else None,
+        'model_server': 'connected' if model_client.available() else 'not running',
+        'shadow': shadow_evaluator.stats() if shadow_evaluator is not None else None,
+        'visualization': 'matplotlib ready',
+        'chart_cache': chart_cache.stats(),
+        'render_pool': render_pool.stats(),
+        'single_flight': request_flight.stats(),
+        'admission': {'ml': ml_gate.stats(), 'chart_render': chart_gate.stats()}
     })
 
 if __name__ == '__main__':
+    # Background threads start here, not at import: render workers import this module
+    render_pool.start()
+    get_model_watcher().start()
+    shadow_evaluator = create_shadow_evaluator()
     print("=" * 60)
     print("🚀 VASTU VISION - ML ANALYSIS SERVER")
     print("=" * 60)
-    print("📊 ML Model: Loaded")
+    if model_watcher.predictor.is_loaded():
+        print(f"📊 ML Model: Loaded (version {model_watcher.predictor.version})")
+    else:
+        print("📊 ML Model: Not found, using mock predictions")
     print("🎨 Matplotlib: Ready for 2D visualization")
     print("🌐 Server: http://localhost:5000")
     print("✅ Ready to analyze!")
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Vastu Vision Chart Renderer
+Builds the 5-elements bar + radar figure once per worker and only updates
+the data-dependent artists on each render
+"""
+
+import os
+import sys
+import time
+import threading
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from image_encoding import encode_figure
+
+ELEMENT_NAMES = ['Fire', 'Water', 'Earth', 'Air', 'Space']
+ELEMENT_COLORS = ['#E07A5F', '#2A9D8F', '#EAD7C0', '#E9C46A', '#264653']
+BACKGROUND_COLOR = '#FFF8E7'
+RADAR_COLOR = '#F4A261'
+GOOD_THRESHOLD = 70
+DPI = 150
+
+# Request `render` option: PNG chart, a chart spec for client-side drawing, or nothing
+RENDER_MODES = ('png', 'spec', 'none')
+
+class ElementsChartRenderer:
+    """Persistent figure for the 5-elements chart
+
+    The layout (axes, ticks, grid, legend, threshold line, tight_layout)
+    is built once. render() moves the bars, value labels, radar polygon and
+    title, then saves with a precomputed bounding box so each PNG costs a
+    single draw instead of the two that bbox_inches='tight' needs.
+    """
+
+    def __init__(self, title='5 Elements Analysis'):
+        self.lock = threading.Lock()
+        self.figure = Figure(figsize=(14, 6))
+        FigureCanvasAgg(self.figure)
+        self.figure.patch.set_facecolor(BACKGROUND_COLOR)
+        initial_values = [100] * len(ELEMENT_NAMES)
+
+        # --- LEFT PLOT: Bar Chart of 5 Elements ---
+        ax1 = self.figure.add_subplot(121)
+        self.bars = ax1.bar(ELEMENT_NAMES, initial_values, color=ELEMENT_COLORS,
+                            edgecolor='black', linewidth=1.5)
+        self.value_labels = [
+            ax1.text(bar.get_x() + bar.get_width() / 2., bar.get_height(), '100.0%',
+                     ha='center', va='bottom', fontsize=11, fontweight='bold')
+            for bar in self.bars
+        ]
+        ax1.set_ylabel('Score (%)', fontsize=12, fontweight='bold')
+        ax1.set_title(title, fontsize=14, fontweight='bold', pad=20)
+        ax1.set_ylim(0, 110)
+        ax1.grid(axis='y', alpha=0.3, linestyle='--')
+        ax1.set_facecolor('#FFFFFF')
+        ax1.axhline(y=GOOD_THRESHOLD, color='green', linestyle='--', linewidth=1, alpha=0.5,
+                    label='Good Threshold')
+        ax1.legend(loc='upper right')
+
+        # --- RIGHT PLOT: Radar Chart of 5 Elements ---
+        ax2 = self.figure.add_subplot(122, projection='polar')
+        self.angles = np.linspace(0, 2 * np.pi, len(ELEMENT_NAMES), endpoint=False).tolist()
+        self.angles += self.angles[:1]
+        radar_values = initial_values + initial_values[:1]
+        self.radar_line, = ax2.plot(self.angles, radar_values, 'o-', linewidth=2, color=RADAR_COLOR)
+        self.radar_fill, = ax2.fill(self.angles, radar_values, alpha=0.25, color=RADAR_COLOR)
+        ax2.set_xticks(self.angles[:-1])
+        ax2.set_xticklabels(ELEMENT_NAMES, fontsize=10, fontweight='bold')
+        ax2.set_ylim(0, 100)
+        self.score_title = ax2.set_title('Vastu Score: 100.0%', fontsize=14, fontweight='bold',
+                                         pad=20, color='#2A9D8F')
+        ax2.grid(True, alpha=0.3)
+        ax2.set_facecolor('#FFFFFF')
+        ax2.set_yticks([25, 50, 75, 100])
+        ax2.set_yticklabels(['25%', '50%', '75%', '100%'], fontsize=8)
+
+        self.figure.tight_layout()
+
+        # Fix the saved area to the tight box of the widest possible labels
+        self.figure.canvas.draw()
+        self.bbox = self.figure.get_tightbbox(self.figure.canvas.get_renderer()).padded(0.1)
+
+    def update(self, elements, vastu_score):
+        values = [elements.get(name, 0) for name in ELEMENT_NAMES]
+        for bar, label, value in zip(self.bars, self.value_labels, values):
+            bar.set_height(value)
+            label.set_y(value)
+            label.set_text(f'{value:.1f}%')
+
+        radar_values = values + values[:1]
+        self.radar_line.set_data(self.angles, radar_values)
+        self.radar_fill.set_xy(np.column_stack([self.angles, radar_values]))
+        self.score_title.set_text(f'Vastu Score: {vastu_score:.1f}%')
+
+    def render(self, elements, vastu_score):
+        """Render the chart for one result to encoded image bytes"""
+        with self.lock:
+            self.update(elements, vastu_score)
+            return encode_figure(self.figure, DPI, self.bbox, BACKGROUND_COLOR)
+
+def chart_spec(title, elements, vastu_score):
+    """Data needed to draw the 5-elements chart client-side, without rendering it"""
+    return {
+        'type': 'elements_bar_radar',
+        'title': title,
+        'series': [{'name': name, 'value': elements.get(name, 0), 'color': color}
+                   for name, color in zip(ELEMENT_NAMES, ELEMENT_COLORS)],
+        'vastu_score': vastu_score,
+        'thresholds': {'good': GOOD_THRESHOLD},
+        'axes': {'bar_max': 110, 'radar_max': 100, 'radar_ticks': [25, 50, 75, 100]},
+        'colors': {'background': BACKGROUND_COLOR, 'radar': RADAR_COLOR}
+    }
+
+# Per-process renderers by title, so forked render workers never share a
+# figure (or its lock) with the parent
+process_renderers = {}
+process_renderers_lock = threading.Lock()
+
+def reset_renderers_lock():
+    # A render thread may hold the lock at fork time; the child gets a fresh one
+    global process_renderers_lock
+    process_renderers_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=reset_renderers_lock)
+
+def render_chart(title, elements, vastu_score):
+    """Render with this process's persistent renderer for `title`"""
+    key = (os.getpid(), title)
+    renderer = process_renderers.get(key)
+    if renderer is None:
+        with process_renderers_lock:
+            renderer = process_renderers.get(key)
+            if renderer is None:
+                renderer = process_renderers[key] = ElementsChartRenderer(title=title)
+    return renderer.render(elements, vastu_score)
+
+def render_chart_per_request(elements, vastu_score, title='5 Elements Analysis'):
+    """The original per-request path, for benchmark(): a fresh pyplot figure,
+    tight_layout and a bbox_inches='tight' save, with the same encoder as render()"""
+    import matplotlib.pyplot as plt
+
+    values = [elements.get(name, 0) for name in ELEMENT_NAMES]
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+    fig.patch.set_facecolor(BACKGROUND_COLOR)
+
+    bars = ax1.bar(ELEMENT_NAMES, values, color=ELEMENT_COLORS, edgecolor='black', linewidth=1.5)
+    for bar, value in zip(bars, values):
+        ax1.text(bar.get_x() + bar.get_width() / 2., bar.get_height(), f'{value:.1f}%',
+                 ha='center', va='bottom', fontsize=11, fontweight='bold')
+    ax1.set_ylabel('Score (%)', fontsize=12, fontweight='bold')
+    ax1.set_title(title, fontsize=14, fontweight='bold', pad=20)
+    ax1.set_ylim(0, 110)
+    ax1.grid(axis='y', alpha=0.3, linestyle='--')
+    ax1.set_facecolor('#FFFFFF')
+    ax1.axhline(y=GOOD_THRESHOLD, color='green', linestyle='--', linewidth=1, alpha=0.5, label='Good Threshold')
+    ax1.legend(loc='upper right')
+
+    angles = np.linspace(0, 2 * np.pi, len(ELEMENT_NAMES), endpoint=False).tolist()
+    angles += angles[:1]
+    radar_values = values + values[:1]
+    ax2 = plt.subplot(122, projection='polar')
+    ax2.plot(angles, radar_values, 'o-', linewidth=2, color=RADAR_COLOR)
+    ax2.fill(angles, radar_values, alpha=0.25, color=RADAR_COLOR)
+    ax2.set_xticks(angles[:-1])
+    ax2.set_xticklabels(ELEMENT_NAMES, fontsize=10, fontweight='bold')
+    ax2.set_ylim(0, 100)
+    ax2.set_title(f'Vastu Score: {vastu_score:.1f}%', fontsize=14, fontweight='bold', pad=20, color='#2A9D8F')
+    ax2.grid(True, alpha=0.3)
+    ax2.set_facecolor('#FFFFFF')
+    ax2.set_yticks([25, 50, 75, 100])
+    ax2.set_yticklabels(['25%', '50%', '75%', '100%'], fontsize=8)
+
+    plt.tight_layout()
+    try:
+        return encode_figure(fig, DPI, 'tight', BACKGROUND_COLOR)
+    finally:
+        plt.close(fig)
+
+def benchmark(renders=20):
+    """Compare the original build-per-request chart against reusing one renderer,
+    both encoded with the configured image format"""
+    rng = np.random.default_rng(0)
+    samples = [({name: int(v) for name, v in zip(ELEMENT_NAMES, rng.integers(30, 101, 5))},
+                float(rng.uniform(50, 100))) for _ in range(renders)]
+
+    # Warm up fonts and pyplot so neither side pays one-off costs
+    render_chart_per_request(*samples[0])
+    renderer = ElementsChartRenderer()
+    renderer.render(*samples[0])
+
+    start = time.perf_counter()
+    for elements, score in samples:
+        render_chart_per_request(elements, score)
+    rebuild_ms = (time.perf_counter() - start) / renders * 1000
+
+    start = time.perf_counter()
+    for elements, score in samples:
+        renderer.render(elements, score)
+    persistent_ms = (time.perf_counter() - start) / renders * 1000
+
+    print(f"Build per request:   {rebuild_ms:.1f} ms")
+    print(f"Persistent renderer: {persistent_ms:.1f} ms ({rebuild_ms / persistent_ms:.1f}x faster)")
+
+if __name__ == '__main__':
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
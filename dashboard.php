@@ -1152,8 +1152,11 @@ $user_name = $_SESSION['user_name'] ?? 'User';
         document.getElementById('ruleScoreDisplay').textContent = 'Rules: ' + result.rule_score + '%';
         
         // Populate Visualization
-        if (result.visualization) {
-            document.getElementById('visualizationImage').src = 'data:image/png;base64,' + result.visualization;
+        if (result.visualization_url || result.visualization) {
+            // Image URLs are relative to the image analysis server
+            const visualizationUrl = result.visualization_url && result.visualization_url.startsWith('/')
+                ? 'http://localhost:5001' + result.visualization_url : result.visualization_url;
+            document.getElementById('visualizationImage').src = visualizationUrl || 'data:image/png;base64,' + result.visualization;
         }
         
         // Populate Elements Breakdown
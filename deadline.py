@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Vastu Vision Request Deadlines
+A per-request time budget that each stage checks before doing optional
+work, recording which stages were degraded to stay within it
+"""
+
+import os
+import math
+import time
+from flask import request
+
+REQUEST_BUDGET = float(os.environ.get('VASTU_REQUEST_BUDGET', 8.0))  # seconds
+MAX_REQUEST_BUDGET = float(os.environ.get('VASTU_MAX_REQUEST_BUDGET', 30.0))
+
+class Deadline:
+    """Time budget for one request"""
+
+    def __init__(self, budget=REQUEST_BUDGET):
+        self.budget = budget
+        self.start = time.monotonic()
+        self.expires = self.start + budget
+        self.degraded = []
+
+    @classmethod
+    def from_request(cls, data, default=REQUEST_BUDGET):
+        """Budget from {"deadline_ms": ...} or the X-Request-Deadline-Ms header, else the default"""
+        value = (data or {}).get('deadline_ms')
+        if value is None:
+            value = request.headers.get('X-Request-Deadline-Ms')
+        budget = default
+        if value is not None:
+            try:
+                # An explicit 0 is a real (already spent) budget, not "unset"
+                budget = float(value) / 1000
+            except (TypeError, ValueError):
+                pass
+        if math.isnan(budget):
+            budget = default
+        return cls(min(max(budget, 0.0), MAX_REQUEST_BUDGET))
+
+    def remaining(self):
+        return max(0.0, self.expires - time.monotonic())
+
+    def degrade(self, stage, reason):
+        print(f"⏱️ Deadline: {stage} degraded ({reason}), {self.remaining() * 1000:.0f} ms left")
+        self.degraded.append({'stage': stage, 'reason': reason})
+
+    def report(self):
+        """Response fields describing the budget and any degraded stages"""
+        return {
+            'deadline_ms': round(self.budget * 1000),
+            'elapsed_ms': round((time.monotonic() - self.start) * 1000, 1),
+            'degraded': self.degraded
+        }
@@ -4,121 +4,334 @@ Vastu Blueprint Generator - Professional Floor Plans
 Generates detailed, realistic floor plan blueprints with NO blank spaces
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context, url_for
 from flask_cors import CORS
 import matplotlib
 matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from matplotlib.patches import Arc
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import EllipseCollection, LineCollection, PolyCollection
+from matplotlib.colors import to_rgba_array
+import os
+import sys
+import time
+import threading
 import numpy as np
 import io
+import json
 import base64
+from contextlib import nullcontext
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeoutError
+
+from image_encoding import encode_figure, encode_image, figure_to_image, IMAGE_FORMAT
+from render_cache import RenderCache, RENDER_CACHE_DIR, is_image_id, wants_inline_images
+from tile_pyramid import build_pyramid, build_pyramid_from_bytes, image_size, pyramid_info
+from render_pool import RenderPool, RENDER_TIMEOUT, RENDER_WORKERS
+from admission import AdmissionGate, Overloaded, overloaded_response
+from single_flight import SingleFlight, coalesce
 
 app = Flask(__name__)
 CORS(app)
+app.register_error_handler(Overloaded, overloaded_response)
+
+# Identical concurrent requests share one computation
+request_flight = SingleFlight()
+
+BLUEPRINT_LAYOUTS = [
+    {'type': 'optimal', 'name': 'Optimal Vastu Layout', 'score': 95, 
+     'desc': 'Perfect Vastu compliance with ideal room placements'},
+    {'type': 'modern', 'name': 'Modern Functional Layout', 'score': 80,
+     'desc': 'Contemporary design with Vastu principles'},
+    {'type': 'compact', 'name': 'Compact Efficient Layout', 'score': 72,
+     'desc': 'Space-efficient with maximum utilization'}
+]
+
+# Blueprint renders run in worker processes, one per layout by default
+# (VASTU_BLUEPRINT_WORKERS; VASTU_RENDER_WORKERS=0 renders in-process)
+BLUEPRINT_WORKERS = int(os.environ.get('VASTU_BLUEPRINT_WORKERS', len(BLUEPRINT_LAYOUTS) if RENDER_WORKERS else 0))
+render_pool = RenderPool(workers=BLUEPRINT_WORKERS)
+# A blueprint request holds one slot while all of its layouts render side by
+# side, so each admitted request gets a worker per layout; the rest wait
+# (bounded) or get a 503
+blueprint_gate = AdmissionGate('blueprint_render',
+                               max_concurrent=render_pool.workers // len(BLUEPRINT_LAYOUTS))
+
+BLUEPRINT_DPI = 200
+BLUEPRINT_BACKGROUND = '#F5F5F5'
+
+# Standard plot sizes whose blueprints are pre-rendered at deploy/start time
+STANDARD_PLOT_AREAS = [int(area) for area in
+                       os.environ.get('VASTU_BLUEPRINT_SIZES', '1000,1200,1500,2400').split(',') if area]
+# Pinned store of the standard sizes: never trimmed, so live traffic can't evict it
+BLUEPRINT_STORE_DIR = os.environ.get('VASTU_BLUEPRINT_STORE', os.path.join(os.path.dirname(__file__) or '.',
+                                                                         'blueprint_store'))
+# Trimmed disk cache of live renders of other sizes
+BLUEPRINT_CACHE_DIR = os.environ.get('VASTU_BLUEPRINT_CACHE',
+                                     os.path.join(RENDER_CACHE_DIR, 'blueprints') if RENDER_CACHE_DIR else '')
+
+def subdir(directory, name):
+    return os.path.join(directory, name) if directory else None
+
+# Rendered blueprints by content, served from GET /images/<id>
+blueprint_cache = RenderCache(max_entries=64, disk_dir=BLUEPRINT_CACHE_DIR, max_disk_entries=500,
+                              pinned_dir=BLUEPRINT_STORE_DIR)
+# Each blueprint's thumbnail and zoom tiles (a few hundred small PNGs per
+# blueprint), served from GET /tiles/<id>/...
+tile_cache = RenderCache(max_entries=2048, disk_dir=subdir(BLUEPRINT_CACHE_DIR, 'tiles'), max_disk_entries=50000,
+                         pinned_dir=subdir(BLUEPRINT_STORE_DIR, 'tiles'))
+
+class BlueprintShapes:
+    """Collects blueprint walls, doors and furniture so each kind of shape is
+    drawn as one collection instead of one artist per wall, bed or chair"""
+
+    def __init__(self):
+        self.rects = []    # x, y, width, height, facecolor, edgecolor, linewidth, alpha
+        self.circles = []  # cx, cy, radius, color, linewidth, alpha
+        self.lines = []    # x0, y0, x1, y1, linewidth
+        self.arcs = []     # cx, cy, width, height, theta1, theta2, linewidth
+
+    def rect(self, x, y, width, height, facecolor, edgecolor, linewidth, alpha=None):
+        self.rects.append((x, y, width, height, facecolor, edgecolor, linewidth, alpha))
+
+    def circle(self, cx, cy, radius, color, linewidth=1.0, alpha=None):
+        # Matches patches.Circle(color=...): one color for face and edge
+        self.circles.append((cx, cy, radius, color, linewidth, alpha))
+
+    def line(self, x0, y0, x1, y1, linewidth):
+        self.lines.append((x0, y0, x1, y1, linewidth))
+
+    def arc(self, cx, cy, width, height, theta1, theta2, linewidth):
+        self.arcs.append((cx, cy, width, height, theta1, theta2, linewidth))
+
+    @staticmethod
+    def colors(colors, alphas):
+        rgba = to_rgba_array(colors)
+        for i, alpha in enumerate(alphas):
+            if alpha is not None:
+                rgba[i, 3] = alpha
+        return rgba
+
+    def draw(self, ax, arc_segments=24):
+        if self.rects:
+            x, y, w, h = np.array([r[:4] for r in self.rects], dtype=float).T
+            corners = np.stack([np.column_stack([x, y]), np.column_stack([x + w, y]),
+                                np.column_stack([x + w, y + h]), np.column_stack([x, y + h])], axis=1)
+            alphas = [r[7] for r in self.rects]
+            ax.add_collection(PolyCollection(
+                corners, facecolors=self.colors([r[4] for r in self.rects], alphas),
+                edgecolors=self.colors([r[5] for r in self.rects], alphas),
+                linewidths=[r[6] for r in self.rects], joinstyle='miter', zorder=1))
 
-def draw_door(ax, x, y, width, height, direction='right'):
+        if self.circles:
+            cx, cy, radius = np.array([c[:3] for c in self.circles], dtype=float).T
+            rgba = self.colors([c[3] for c in self.circles], [c[5] for c in self.circles])
+            ax.add_collection(EllipseCollection(
+                2 * radius, 2 * radius, np.zeros(len(radius)), units='xy',
+                offsets=np.column_stack([cx, cy]), offset_transform=ax.transData,
+                facecolors=rgba, edgecolors=rgba, linewidths=[c[4] for c in self.circles], zorder=1))
+
+        segments = []
+        widths = []
+        if self.lines:
+            lines = np.array(self.lines, dtype=float)
+            segments.extend(lines[:, :4].reshape(-1, 2, 2))
+            widths.extend(lines[:, 4])
+        if self.arcs:
+            arcs = np.array(self.arcs, dtype=float)
+            t = np.deg2rad(np.linspace(arcs[:, 4], arcs[:, 5], arc_segments + 1, axis=1))
+            xs = arcs[:, [0]] + arcs[:, [2]] / 2 * np.cos(t)
+            ys = arcs[:, [1]] + arcs[:, [3]] / 2 * np.sin(t)
+            segments.extend(np.stack([xs, ys], axis=2))
+            widths.extend(arcs[:, 6])
+        if segments:
+            ax.add_collection(LineCollection(segments, colors='black', linewidths=widths,
+                                             capstyle='projecting', joinstyle='round', zorder=2))
+
+def draw_door(shapes, x, y, width, height, direction='right'):
     """Draw a door with arc"""
     if direction == 'right':
-        door_arc = Arc((x, y + height/2), width*0.6, height*0.6, 
-                      angle=0, theta1=0, theta2=90, color='black', linewidth=2)
-        ax.add_patch(door_arc)
-        ax.plot([x, x + width*0.3], [y + height/2, y + height/2], 'k-', linewidth=2)
+        shapes.arc(x, y + height/2, width*0.6, height*0.6, 0, 90, linewidth=2)
+        shapes.line(x, y + height/2, x + width*0.3, y + height/2, linewidth=2)
     elif direction == 'top':
-        door_arc = Arc((x + width/2, y), width*0.6, height*0.6,
-                      angle=0, theta1=180, theta2=270, color='black', linewidth=2)
-        ax.add_patch(door_arc)
-        ax.plot([x + width/2, x + width/2], [y, y + height*0.3], 'k-', linewidth=2)
+        shapes.arc(x + width/2, y, width*0.6, height*0.6, 180, 270, linewidth=2)
+        shapes.line(x + width/2, y, x + width/2, y + height*0.3, linewidth=2)
 
-def draw_furniture(ax, room_type, x, y, width, height):
+def draw_furniture(shapes, room_type, x, y, width, height):
     """Draw furniture based on room type"""
     cx, cy = x + width/2, y + height/2
     
     if 'bedroom' in room_type.lower():
         # Bed
         bed_w, bed_h = min(width*0.5, 6), min(height*0.6, 8)
-        bed = patches.Rectangle((cx - bed_w/2, cy - bed_h/2), bed_w, bed_h,
-                                linewidth=2, edgecolor='#333', facecolor='#D3D3D3')
-        ax.add_patch(bed)
+        shapes.rect(cx - bed_w/2, cy - bed_h/2, bed_w, bed_h, '#D3D3D3', '#333', 2)
         # Pillow
-        pillow = patches.Rectangle((cx - bed_w/2, cy + bed_h/2 - 1), bed_w, 1,
-                                   linewidth=1, edgecolor='#333', facecolor='white')
-        ax.add_patch(pillow)
+        shapes.rect(cx - bed_w/2, cy + bed_h/2 - 1, bed_w, 1, 'white', '#333', 1)
         
     elif 'living' in room_type.lower() or 'drawing' in room_type.lower():
         # Sofa
         sofa_w, sofa_h = min(width*0.6, 8), min(height*0.3, 4)
-        sofa = patches.Rectangle((cx - sofa_w/2, y + height*0.25), sofa_w, sofa_h,
-                                 linewidth=2, edgecolor='#333', facecolor='#A9A9A9')
-        ax.add_patch(sofa)
+        shapes.rect(cx - sofa_w/2, y + height*0.25, sofa_w, sofa_h, '#A9A9A9', '#333', 2)
         # Table
-        table = plt.Circle((cx, cy - height*0.15), min(width, height)*0.15,
-                          color='#8B4513', alpha=0.4, linewidth=2, edgecolor='#333')
-        ax.add_patch(table)
+        shapes.circle(cx, cy - height*0.15, min(width, height)*0.15, '#8B4513', linewidth=2, alpha=0.4)
         
     elif 'kitchen' in room_type.lower():
         # Counter
         counter_w, counter_h = width*0.85, height*0.25
-        counter = patches.Rectangle((x + width*0.075, y + height*0.1), counter_w, counter_h,
-                                    linewidth=2, edgecolor='#333', facecolor='#C0C0C0')
-        ax.add_patch(counter)
+        shapes.rect(x + width*0.075, y + height*0.1, counter_w, counter_h, '#C0C0C0', '#333', 2)
         # Stove circles
         for i in range(2):
-            stove = plt.Circle((x + width*0.3 + i*width*0.35, y + height*0.225), 0.5,
-                              color='black', alpha=0.6)
-            ax.add_patch(stove)
+            shapes.circle(x + width*0.3 + i*width*0.35, y + height*0.225, 0.5, 'black', alpha=0.6)
         # Sink
-        sink = patches.Rectangle((x + width*0.75, y + height*0.15), width*0.18, height*0.15,
-                                 linewidth=2, edgecolor='#333', facecolor='#87CEEB')
-        ax.add_patch(sink)
+        shapes.rect(x + width*0.75, y + height*0.15, width*0.18, height*0.15, '#87CEEB', '#333', 2)
         
     elif 'bathroom' in room_type.lower():
         # Toilet
-        toilet = plt.Circle((x + width*0.25, y + height*0.7), min(width, height)*0.12,
-                           color='white', linewidth=2, edgecolor='#333')
-        ax.add_patch(toilet)
+        shapes.circle(x + width*0.25, y + height*0.7, min(width, height)*0.12, 'white', linewidth=2)
         # Sink
-        sink = plt.Circle((x + width*0.75, y + height*0.75), min(width, height)*0.12,
-                         color='#87CEEB', linewidth=2, edgecolor='#333')
-        ax.add_patch(sink)
+        shapes.circle(x + width*0.75, y + height*0.75, min(width, height)*0.12, '#87CEEB', linewidth=2)
         # Bathtub
-        bathtub = patches.Rectangle((x + width*0.5, y + height*0.15), width*0.45, height*0.35,
-                                    linewidth=2, edgecolor='#333', facecolor='#B0E0E6', alpha=0.5)
-        ax.add_patch(bathtub)
+        shapes.rect(x + width*0.5, y + height*0.15, width*0.45, height*0.35, '#B0E0E6', '#333', 2, alpha=0.5)
         
     elif 'dining' in room_type.lower():
         # Table
         table_w, table_h = min(width*0.6, 6), min(height*0.5, 6)
-        table = patches.Rectangle((cx - table_w/2, cy - table_h/2), table_w, table_h,
-                                  linewidth=2, edgecolor='#333', facecolor='#8B4513', alpha=0.4)
-        ax.add_patch(table)
+        shapes.rect(cx - table_w/2, cy - table_h/2, table_w, table_h, '#8B4513', '#333', 2, alpha=0.4)
         # Chairs
         for pos in [(cx - table_w/2 - 0.7, cy), (cx + table_w/2 + 0.7, cy),
                     (cx, cy - table_h/2 - 0.7), (cx, cy + table_h/2 + 0.7)]:
-            chair = plt.Circle(pos, 0.5, color='#696969', linewidth=1, edgecolor='#333')
-            ax.add_patch(chair)
+            shapes.circle(pos[0], pos[1], 0.5, '#696969', linewidth=1)
+
+def plot_dimensions(plot_area):
+    plot_width = int(plot_area ** 0.5)
+    return plot_width, plot_area // plot_width
+
+def is_standard_plot(plot_width, plot_height):
+    """True for the dimensions of a standard plot size, whose renders go to the pinned store"""
+    return (plot_width, plot_height) in {plot_dimensions(area) for area in STANDARD_PLOT_AREAS}
+
+def blueprint_key(plot_width, plot_height, layout_type):
+    # The drawing depends only on the plot and layout, not on the requested rooms
+    return blueprint_cache.make_key('blueprint', plot_width, plot_height, layout_type, IMAGE_FORMAT)
+
+def tile_key(image_id, part):
+    """Cache key of one pyramid part of a blueprint: 'thumbnail' or (zoom, x, y)"""
+    return tile_cache.make_key('tile', image_id, part)
+
+def store_pyramid(image_id, parts, pinned=False):
+    tile_cache.put_many({tile_key(image_id, part): data for part, data in parts.items()}, pinned)
+
+# Cache writes (a full image, or a pyramid's few hundred tiles plus a disk
+# trim) run here rather than in render-pool done callbacks, which share the
+# pool's result-handling thread
+store_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='blueprint-store')
+# Pyramid cuts in progress: image id -> Future that resolves once the tiles are stored
+pyramid_jobs = {}
+pyramid_jobs_lock = threading.Lock()
+
+def has_pyramid(image_id, pinned=False):
+    thumbnail_key = tile_key(image_id, 'thumbnail')
+    return tile_cache.is_pinned(thumbnail_key) if pinned else tile_cache.get(thumbnail_key) is not None
+
+def pending_pyramid(image_id):
+    with pyramid_jobs_lock:
+        return pyramid_jobs.get(image_id)
+
+def cut_pyramid(image_id, png, pinned=False):
+    """Cut a stored blueprint into its tile pyramid on the render pool and store the
+    tiles in the background; returns a Future that resolves once they are stored.
+    Concurrent calls for the same blueprint share one cut."""
+    with pyramid_jobs_lock:
+        stored = pyramid_jobs.get(image_id)
+        if stored is not None:
+            return stored
+        stored = pyramid_jobs[image_id] = Future()
+
+    def store(done):
+        try:
+            store_pyramid(image_id, done.result()[1], pinned)
+            error = None
+        except Exception as e:
+            error = e
+        # Drop the job first so a failed cut is retried by the next tile request
+        with pyramid_jobs_lock:
+            pyramid_jobs.pop(image_id, None)
+        if error is None:
+            stored.set_result(image_id)
+        else:
+            stored.set_exception(error)
+
+    try:
+        job = render_pool.submit(build_pyramid_from_bytes, png)
+    except Exception as e:
+        job = Future()
+        job.set_exception(e)
+    job.add_done_callback(lambda done: store_executor.submit(store, done))
+    return stored
+
+def submit_blueprint(rooms, plot_width, plot_height, layout_type='optimal', render=True):
+    """Start rendering a blueprint on the render pool, or reuse a cached/pre-rendered
+    one; returns (image id, Future of (PNG, pyramid info)). Render errors are carried
+    by the future. With render=False a blueprint that isn't stored yet is not
+    queued and its future is None.
+
+    The future resolves as soon as the full image is stored; its tile pyramid is
+    cut afterwards, off the response path, and tile requests wait for that cut.
+    """
+    image_id = blueprint_key(plot_width, plot_height, layout_type)
+    pinned = is_standard_plot(plot_width, plot_height)
+    result = Future()
+    png = blueprint_cache.get(image_id)
+    if png is not None:
+        if pinned and not blueprint_cache.is_pinned(image_id):
+            # Rendered before this size was standard (or before the store existed)
+            blueprint_cache.pin(image_id, png)
+        result.set_result((png, pyramid_info(*image_size(png))))
+        if not has_pyramid(image_id, pinned):
+            # Stored before it was tiled, or its tiles were evicted
+            cut_pyramid(image_id, png, pinned)
+        return image_id, result
+    if not render:
+        return image_id, None
+
+    try:
+        job = render_pool.submit(render_complete_blueprint, rooms, plot_width, plot_height, layout_type)
+    except Exception as e:
+        result.set_exception(e)
+        return image_id, result
+
+    def cache_render(done):
+        # The image is stored before the caller can hand out its URL
+        try:
+            rendered = done.result()
+            (blueprint_cache.pin if pinned else blueprint_cache.put)(image_id, rendered)
+            result.set_result((rendered, pyramid_info(*image_size(rendered))))
+        except Exception as e:
+            result.set_exception(e)
+            return
+        cut_pyramid(image_id, rendered, pinned)
+    job.add_done_callback(lambda done: store_executor.submit(cache_render, done))
+    return image_id, result
 
 def generate_complete_blueprint(rooms, plot_width, plot_height, layout_type='optimal'):
-    """Generate a complete blueprint with NO blank spaces"""
-    
-    fig, ax = plt.subplots(figsize=(16, 16))
-    fig.patch.set_facecolor('#F5F5F5')
-    ax.set_facecolor('#FFFFFF')
-    
-    margin = 3
-    ax.set_xlim(-margin, plot_width + margin)
-    ax.set_ylim(-margin, plot_height + margin)
-    ax.set_aspect('equal')
-    
-    # Outer walls (thick)
-    outer_wall = patches.Rectangle((0, 0), plot_width, plot_height,
-                                   linewidth=8, edgecolor='#000', facecolor='none')
-    ax.add_patch(outer_wall)
-    
-    # Generate complete room layouts (NO BLANK SPACES)
+    """Render a complete blueprint on the render pool, reusing cached renders; returns (image id, PNG)"""
+    image_id, future = submit_blueprint(rooms, plot_width, plot_height, layout_type)
+    return image_id, future.result(timeout=RENDER_TIMEOUT)[0]
+
+def render_complete_blueprint(rooms, plot_width, plot_height, layout_type='optimal'):
+    """Render a complete blueprint to encoded image bytes"""
+    fig = build_blueprint_figure(rooms, plot_width, plot_height, layout_type)
+    return encode_figure(fig, BLUEPRINT_DPI, 'tight', BLUEPRINT_BACKGROUND)
+
+def render_blueprint_pyramid(rooms, plot_width, plot_height, layout_type='optimal'):
+    """Render a blueprint once and cut it into its tile pyramid, for pre-rendering the standard sizes;
+    returns (image bytes, pyramid info, {'thumbnail' or (zoom, x, y): bytes})"""
+    fig = build_blueprint_figure(rooms, plot_width, plot_height, layout_type)
+    image = figure_to_image(fig, BLUEPRINT_DPI, 'tight', BLUEPRINT_BACKGROUND)
+    return (encode_image(image), *build_pyramid(image))
+
+def blueprint_room_layouts(layout_type, plot_width, plot_height):
+    """Complete room layouts (NO BLANK SPACES) for a layout type"""
     room_layouts = []
-    num_rooms = len(rooms) if rooms else 4
     
     if layout_type == 'optimal':
         # OPTIMAL VASTU LAYOUT - Complete coverage
@@ -194,6 +407,33 @@ def generate_complete_blueprint(rooms, plot_width, plot_height, layout_type='opt
              'width': plot_width*0.5, 'height': plot_height*0.33, 'type': 'bathroom'},
         ]
     
+    return room_layouts
+
+def build_blueprint_figure(rooms, plot_width, plot_height, layout_type='optimal', room_layouts=None):
+    """Draw a complete blueprint with NO blank spaces"""
+    
+    # Own Figure/canvas, no pyplot state, so concurrent renders can't collide
+    fig = Figure(figsize=(16, 16))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    fig.patch.set_facecolor(BLUEPRINT_BACKGROUND)
+    ax.set_facecolor('#FFFFFF')
+    
+    margin = 3
+    ax.set_xlim(-margin, plot_width + margin)
+    ax.set_ylim(-margin, plot_height + margin)
+    ax.set_aspect('equal')
+    
+    # Walls, doors and furniture are gathered here and drawn as a few collections
+    shapes = BlueprintShapes()
+    
+    # Outer walls (thick)
+    shapes.rect(0, 0, plot_width, plot_height, 'none', '#000', 8)
+    
+    # Generate complete room layouts (NO BLANK SPACES)
+    if room_layouts is None:
+        room_layouts = blueprint_room_layouts(layout_type, plot_width, plot_height)
+    
     # Draw all rooms
     for room_data in room_layouts:
         x, y = room_data['x'], room_data['y']
@@ -203,9 +443,9 @@ def generate_complete_blueprint(rooms, plot_width, plot_height, layout_type='opt
         
         # Interior walls
         if x > 0:
-            ax.plot([x, x], [y, y + height], 'k-', linewidth=4)
+            shapes.line(x, y, x, y + height, linewidth=4)
         if y > 0:
-            ax.plot([x, x + width], [y, y], 'k-', linewidth=4)
+            shapes.line(x, y, x + width, y, linewidth=4)
         
         # Room label
         cx, cy = x + width/2, y + height/2
@@ -221,12 +461,12 @@ def generate_complete_blueprint(rooms, plot_width, plot_height, layout_type='opt
                color='#555', fontweight='600')
         
         # Furniture
-        draw_furniture(ax, room_type, x, y, width, height)
+        draw_furniture(shapes, room_type, x, y, width, height)
         
         # Doors
         if 'bathroom' not in room_type.lower() and 'passage' not in room_type.lower():
             if x > 0 and width > 4:
-                draw_door(ax, x, y + height*0.45, width*0.1, height*0.15, 'right')
+                draw_door(shapes, x, y + height*0.45, width*0.1, height*0.15, 'right')
     
     # Compass
     compass_x = plot_width + margin*0.6
@@ -260,29 +500,80 @@ def generate_complete_blueprint(rooms, plot_width, plot_height, layout_type='opt
     # Scale
     scale_length = 10
     scale_y = -margin*0.6
-    ax.plot([5, 5 + scale_length], [scale_y, scale_y], 'k-', linewidth=3)
-    ax.plot([5, 5], [scale_y - 0.4, scale_y + 0.4], 'k-', linewidth=3)
-    ax.plot([5 + scale_length, 5 + scale_length], [scale_y - 0.4, scale_y + 0.4], 'k-', linewidth=3)
+    shapes.line(5, scale_y, 5 + scale_length, scale_y, linewidth=3)
+    shapes.line(5, scale_y - 0.4, 5, scale_y + 0.4, linewidth=3)
+    shapes.line(5 + scale_length, scale_y - 0.4, 5 + scale_length, scale_y + 0.4, linewidth=3)
     ax.text(5 + scale_length/2, scale_y - 1.2, f"SCALE: {scale_length} FEET",
            ha='center', fontsize=10, fontweight='bold', style='italic')
     
+    shapes.draw(ax)
+    
     # Remove axes
     ax.set_xticks([])
     ax.set_yticks([])
     for spine in ax.spines.values():
         spine.set_visible(False)
     
-    plt.tight_layout()
+    fig.tight_layout()
+    
+    return fig
+
+def parse_blueprint_request(data):
+    """Plot area, dimensions, rooms and orientation from a blueprint request body"""
+    plot_size = data.get('plotSize', '1200 sq ft')
+    rooms = data.get('rooms', [])
+    orientation = data.get('orientation', 'north-facing')
     
-    # Save
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', dpi=200, bbox_inches='tight', facecolor='#F5F5F5')
-    buf.seek(0)
-    plt.close()
+    plot_area = 1200
+    try:
+        plot_area = int(''.join(filter(str.isdigit, plot_size)))
+    except:
+        pass
     
-    return base64.b64encode(buf.read()).decode('utf-8')
+    plot_width, plot_height = plot_dimensions(plot_area)
+    return plot_area, plot_width, plot_height, rooms, orientation
+
+def submit_layouts(rooms, plot_width, plot_height, render=True):
+    """Start every layout at once so they render on separate workers; returns (layout, image id, Future)s.
+    With render=False, layouts that aren't stored yet get a None future instead of being queued."""
+    if render:
+        print(f"🎨 Generating {len(BLUEPRINT_LAYOUTS)} blueprints in parallel...")
+    return [(layout, *submit_blueprint(rooms, plot_width, plot_height, layout['type'], render))
+            for layout in BLUEPRINT_LAYOUTS]
+
+def needs_render(jobs):
+    return any(future is None for _, _, future in jobs)
+
+def blueprint_entry(number, layout, image_id, future, inline, timeout=RENDER_TIMEOUT):
+    """Response object for one finished layout; a failed or timed-out render gets None image fields and 'error'"""
+    blueprint = {
+        'id': number,
+        'name': layout['name'],
+        'description': layout['desc'],
+        'vastu_score': layout['score']
+    }
+    try:
+        png, info = future.result(timeout=timeout)
+        blueprint.update({
+            'image_id': image_id,
+            'image_url': url_for('get_image', image_id=image_id),
+            'thumbnail_url': url_for('get_thumbnail', image_id=image_id),
+            'tiles': tile_source(image_id, info),
+            'image': base64.b64encode(png).decode('utf-8') if inline else None
+        })
+    except Exception as e:
+        error = f"Render did not finish within {RENDER_TIMEOUT}s" if isinstance(e, FutureTimeoutError) else str(e)
+        print(f"⚠️ Blueprint {layout['name']} failed: {error}")
+        blueprint.update({'image_id': None, 'image_url': None, 'thumbnail_url': None, 'tiles': None,
+                          'image': None, 'error': error})
+    return blueprint
+
+def tile_source(image_id, info):
+    """Pyramid info plus the tile URL template ({z}/{x}/{y}) clients fill in"""
+    return {'url': url_for('get_pyramid', image_id=image_id) + '/{z}/{x}/{y}', **info}
 
 @app.route('/generate_blueprints', methods=['POST', 'OPTIONS'])
+@coalesce(request_flight)
 def generate_blueprints():
     """Generate professional blueprints"""
     if request.method == 'OPTIONS':
@@ -292,47 +583,26 @@ def generate_blueprints():
         data = request.get_json()
         print("🏗️ Received blueprint generation request")
         
-        plot_size = data.get('plotSize', '1200 sq ft')
-        rooms = data.get('rooms', [])
-        orientation = data.get('orientation', 'north-facing')
-        
-        plot_area = 1200
-        try:
-            plot_area = int(''.join(filter(str.isdigit, plot_size)))
-        except:
-            pass
-        
-        plot_width = int(plot_area ** 0.5)
-        plot_height = plot_area // plot_width
-        
+        plot_area, plot_width, plot_height, rooms, orientation = parse_blueprint_request(data)
         print(f"📐 Plot: {plot_width}x{plot_height}, Rooms: {len(rooms)}")
         
-        blueprints = []
-        layouts = [
-            {'type': 'optimal', 'name': 'Optimal Vastu Layout', 'score': 95, 
-             'desc': 'Perfect Vastu compliance with ideal room placements'},
-            {'type': 'modern', 'name': 'Modern Functional Layout', 'score': 80,
-             'desc': 'Contemporary design with Vastu principles'},
-            {'type': 'compact', 'name': 'Compact Efficient Layout', 'score': 72,
-             'desc': 'Space-efficient with maximum utilization'}
-        ]
+        inline = wants_inline_images(data)
         
-        for i, layout in enumerate(layouts):
-            print(f"🎨 Generating blueprint {i+1}/3 ({layout['name']})...")
-            img = generate_complete_blueprint(rooms, plot_width, plot_height, layout['type'])
-            
-            blueprints.append({
-                'id': i + 1,
-                'name': layout['name'],
-                'description': layout['desc'],
-                'vastu_score': layout['score'],
-                'image': img
-            })
+        # Stored layouts (e.g. pre-rendered standard sizes) are served without a
+        # render slot; the gate is only taken when something has to render
+        jobs = submit_layouts(rooms, plot_width, plot_height, render=False)
+        rendering = needs_render(jobs)
+        with blueprint_gate.admit() if rendering else nullcontext():
+            if rendering:
+                jobs = submit_layouts(rooms, plot_width, plot_height)
+            # Collect in layout order; a failed layout doesn't fail the others
+            blueprints = [blueprint_entry(i + 1, *job, inline) for i, job in enumerate(jobs)]
         
-        print(f"✅ Generated {len(blueprints)} professional blueprints!")
+        rendered = sum(1 for blueprint in blueprints if blueprint['image_id'])
+        print(f"✅ Generated {rendered}/{len(blueprints)} professional blueprints!")
         
         return jsonify({
-            'success': True,
+            'success': rendered > 0,
             'blueprints': blueprints,
             'plot_info': {
                 'width': plot_width,
@@ -340,8 +610,10 @@ def generate_blueprints():
                 'area': plot_area,
                 'orientation': orientation
             }
-        })
+        }), 200 if rendered else 500
         
+    except Overloaded:
+        raise  # answered with 503 + Retry-After by overloaded_response
     except Exception as e:
         print(f"❌ Error: {str(e)}")
         import traceback
@@ -353,11 +625,235 @@ def generate_blueprints():
             'blueprints': []
         }), 500
 
+def stream_event(event, payload, sse):
+    """One streamed message: an SSE event block or an NDJSON line"""
+    if sse:
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+    return json.dumps({'event': event, **payload}) + '\n'
+
+@app.route('/generate_blueprints/stream', methods=['POST', 'OPTIONS'])
+def generate_blueprints_stream():
+    """Generate blueprints, streaming plot_info first and then each blueprint as its render finishes
+
+    NDJSON by default ({"event": ..., ...} per line); Server-Sent Events with
+    Accept: text/event-stream or ?format=sse. Blueprints arrive in completion
+    order, so clients place them by 'id'. Only one encoded image is held for
+    the response at a time.
+    """
+    if request.method == 'OPTIONS':
+        return '', 200
+    
+    try:
+        data = request.get_json()
+        print("🏗️ Received streaming blueprint generation request")
+        
+        plot_area, plot_width, plot_height, rooms, orientation = parse_blueprint_request(data)
+        print(f"📐 Plot: {plot_width}x{plot_height}, Rooms: {len(rooms)}")
+        
+        inline = wants_inline_images(data)
+        sse = request.args.get('format') == 'sse' or \
+            request.accept_mimetypes.best == 'text/event-stream'
+        
+        jobs = submit_layouts(rooms, plot_width, plot_height, render=False)
+        rendering = needs_render(jobs)
+        if rendering:
+            # Taken before the response starts so overload is still a 503; released
+            # when the stream closes, including when the client disconnects early.
+            # Fully stored requests skip it.
+            blueprint_gate.acquire()
+            admitted = time.perf_counter()
+            try:
+                jobs = submit_layouts(rooms, plot_width, plot_height)
+            except Exception:
+                blueprint_gate.release(time.perf_counter() - admitted)
+                raise
+    except Overloaded:
+        raise  # answered with 503 + Retry-After by overloaded_response
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'blueprints': []
+        }), 500
+    
+    def generate():
+        yield stream_event('plot_info', {'plot_info': {
+            'width': plot_width,
+            'height': plot_height,
+            'area': plot_area,
+            'orientation': orientation
+        }}, sse)
+        
+        numbers = {future: (i + 1, layout, image_id) for i, (layout, image_id, future) in enumerate(jobs)}
+        jobs.clear()
+        rendered = 0
+        try:
+            for future in as_completed(list(numbers), timeout=RENDER_TIMEOUT):
+                # Drop each future once sent so its image can be freed
+                number, layout, image_id = numbers.pop(future)
+                blueprint = blueprint_entry(number, layout, image_id, future, inline)
+                rendered += 1 if blueprint['image_id'] else 0
+                yield stream_event('blueprint', {'blueprint': blueprint}, sse)
+        except FutureTimeoutError:
+            # A hung render must not hold the stream (and its render slot) open:
+            # report the layouts still pending as failed and finish
+            for future, (number, layout, image_id) in sorted(numbers.items(), key=lambda item: item[1][0]):
+                yield stream_event('blueprint', {'blueprint': blueprint_entry(number, layout, image_id, future,
+                                                                              inline, timeout=0)}, sse)
+        
+        print(f"✅ Streamed {rendered}/{len(BLUEPRINT_LAYOUTS)} professional blueprints!")
+        yield stream_event('done', {'success': rendered > 0, 'rendered': rendered}, sse)
+    
+    response = Response(stream_with_context(generate()),
+                        mimetype='text/event-stream' if sse else 'application/x-ndjson')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # don't let a proxy hold back events
+    if rendering:
+        response.call_on_close(lambda: blueprint_gate.release(time.perf_counter() - admitted))
+    return response
+
+@app.route('/images/<image_id>', methods=['GET'])
+def get_image(image_id):
+    """Serve a rendered blueprint as raw PNG"""
+    return blueprint_cache.image_response(image_id)
+
+@app.route('/tiles/<image_id>', methods=['GET'])
+def get_pyramid(image_id):
+    """Tile pyramid levels of a rendered blueprint, with the tile URL template"""
+    png = blueprint_cache.get(image_id) if is_image_id(image_id) else None
+    if png is None:
+        return jsonify({'success': False, 'error': 'Image expired, please re-run the request'}), 404
+    return jsonify({'success': True, **tile_source(image_id, pyramid_info(*image_size(png)))})
+
+@app.route('/tiles/<image_id>/thumbnail', methods=['GET'])
+def get_thumbnail(image_id):
+    """Serve a blueprint's card-sized thumbnail"""
+    return tile_response(image_id, 'thumbnail')
+
+@app.route('/tiles/<image_id>/<int:zoom>/<int:x>/<int:y>', methods=['GET'])
+def get_tile(image_id, zoom, x, y):
+    """Serve one 256 px tile of a blueprint at a zoom level (0 = whole plan in one tile)"""
+    return tile_response(image_id, (zoom, x, y))
+
+def tile_response(image_id, part):
+    """Serve one pyramid part, re-cutting the pyramid from the stored blueprint if it was evicted"""
+    if not is_image_id(image_id):
+        return jsonify({'success': False, 'error': 'Invalid image id'}), 404
+    key = tile_key(image_id, part)
+    if not request.if_none_match.contains(key) and tile_cache.get(key) is None:
+        png = blueprint_cache.get(image_id)
+        if png is None:
+            return jsonify({'success': False, 'error': 'Image expired, please re-run the request'}), 404
+        if part != 'thumbnail':
+            zoom, x, y = part
+            levels = pyramid_info(*image_size(png))['levels']
+            if zoom >= len(levels) or x >= levels[zoom]['columns'] or y >= levels[zoom]['rows']:
+                return jsonify({'success': False, 'error': 'No such tile'}), 404
+        try:
+            pending = pending_pyramid(image_id)
+            if pending is not None:
+                # Already being cut, e.g. right after the blueprint rendered
+                pending.result(timeout=RENDER_TIMEOUT)
+            else:
+                # An evicted pyramid is re-cut on a render worker, admitted like a render
+                with blueprint_gate.admit():
+                    cut_pyramid(image_id, png, blueprint_cache.is_pinned(image_id)).result(timeout=RENDER_TIMEOUT)
+        except FutureTimeoutError:
+            raise Overloaded('blueprint_tiles', message='Tiles are still being cut, please retry')
+    return tile_cache.image_response(key)
+
 @app.route('/health', methods=['GET'])
 def health():
-    return jsonify({'status': 'ok', 'service': 'professional_blueprint_generator'})
+    return jsonify({
+        'status': 'ok',
+        'service': 'professional_blueprint_generator',
+        'blueprint_cache': blueprint_cache.stats(),
+        'tile_cache': tile_cache.stats(),
+        'render_pool': render_pool.stats(),
+        'single_flight': request_flight.stats(),
+        'admission': {'blueprint_render': blueprint_gate.stats()}
+    })
+
+def missing_standard_blueprints():
+    """(plot_width, plot_height, layout_type) for standard sizes not yet in the store with their tiles"""
+    missing = []
+    for plot_area in STANDARD_PLOT_AREAS:
+        plot_width, plot_height = plot_dimensions(plot_area)
+        for layout in BLUEPRINT_LAYOUTS:
+            image_id = blueprint_key(plot_width, plot_height, layout['type'])
+            if not blueprint_cache.is_pinned(image_id) or not tile_cache.is_pinned(tile_key(image_id, 'thumbnail')):
+                missing.append((plot_width, plot_height, layout['type']))
+    return missing
+
+def precompute_blueprints():
+    """Deploy step: render every layout for the standard plot sizes into the store"""
+    missing = missing_standard_blueprints()
+    print(f"🏗️ Pre-rendering {len(missing)} standard blueprints into {BLUEPRINT_STORE_DIR}")
+    for plot_width, plot_height, layout_type in missing:
+        start = time.perf_counter()
+        png, info, parts = render_blueprint_pyramid([], plot_width, plot_height, layout_type)
+        image_id = blueprint_key(plot_width, plot_height, layout_type)
+        blueprint_cache.pin(image_id, png)
+        store_pyramid(image_id, parts, pinned=True)
+        print(f"  {plot_width}x{plot_height} {layout_type}: {len(png) / 1024:.0f} KB + {len(parts)} tiles "
+              f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+def prerender_in_background():
+    """Server start: queue any standard blueprints missing from the store on the render pool"""
+    def run():
+        missing = missing_standard_blueprints()
+        if missing:
+            print(f"🏗️ Pre-rendering {len(missing)} standard blueprints in the background")
+        for plot_width, plot_height, layout_type in missing:
+            image_id = blueprint_key(plot_width, plot_height, layout_type)
+            try:
+                png = blueprint_cache.get(image_id)
+                if png is None:
+                    png, info, parts = render_pool.render(render_blueprint_pyramid, [], plot_width, plot_height,
+                                                          layout_type)
+                    blueprint_cache.pin(image_id, png)
+                    store_pyramid(image_id, parts, pinned=True)
+                else:
+                    if not blueprint_cache.is_pinned(image_id):
+                        blueprint_cache.pin(image_id, png)
+                    cut_pyramid(image_id, png, pinned=True).result(timeout=RENDER_TIMEOUT)
+            except Exception as e:
+                print(f"⚠️ Pre-render of {plot_width}x{plot_height} {layout_type} failed: {e}")
+    threading.Thread(target=run, name='blueprint-prerender', daemon=True).start()
+
+def grid_room_layouts(room_count, plot_width, plot_height):
+    """Synthetic layout of room_count rooms in a grid, cycling through furnished room types"""
+    room_types = ['bedroom', 'living room', 'kitchen', 'bathroom', 'dining room']
+    cols = int(np.ceil(np.sqrt(room_count)))
+    rows = int(np.ceil(room_count / cols))
+    width, height = plot_width / cols, plot_height / rows
+    return [{'name': f'Room-{i + 1}', 'x': (i % cols) * width, 'y': (i // cols) * height,
+             'width': width, 'height': height, 'type': room_types[i % len(room_types)]}
+            for i in range(room_count)]
+
+def benchmark(room_counts=(9, 25, 49, 100), repeats=3):
+    """Time drawing + rasterizing a blueprint at increasing room counts"""
+    print("Blueprint render benchmark (draw + rasterize at 200 dpi)")
+    for room_count in room_counts:
+        room_layouts = grid_room_layouts(room_count, 60, 60)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            fig = build_blueprint_figure([], 60, 60, 'optimal', room_layouts)
+            fig.savefig(io.BytesIO(), format='rgba', dpi=BLUEPRINT_DPI, bbox_inches='tight')
+        print(f"  {room_count:4d} rooms: {(time.perf_counter() - start) / repeats * 1000:.0f} ms")
 
 if __name__ == '__main__':
+    if '--benchmark' in sys.argv:
+        benchmark()
+        sys.exit(0)
+    if '--precompute' in sys.argv:
+        precompute_blueprints()
+        sys.exit(0)
+    
+    # Start render workers (they import this module, so nothing here runs in them)
+    render_pool.start()
+    prerender_in_background()
     print("=" * 70)
     print("🏗️ VASTU VISION - PROFESSIONAL BLUEPRINT GENERATOR")
     print("=" * 70)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Vastu Vision Image Encoding
+Turns a rendered matplotlib figure into a compact image straight from the
+Agg canvas buffer: a palette-quantized PNG by default, or lossless WebP
+"""
+
+import io
+import os
+import time
+from PIL import Image
+
+# 'png' = palette PNG, 'webp' = lossless WebP, 'rgba' = matplotlib's full RGBA PNG
+IMAGE_FORMAT = os.environ.get('VASTU_IMAGE_FORMAT', 'png')
+PALETTE_COLORS = int(os.environ.get('VASTU_PNG_COLORS', 256))
+PNG_COMPRESS_LEVEL = int(os.environ.get('VASTU_PNG_COMPRESS', 9))
+
+def figure_to_image(fig, dpi, bbox_inches=None, facecolor=None):
+    """Rasterize a figure to an RGB PIL image without a PNG round trip"""
+    buf = io.BytesIO()
+    fig.savefig(buf, format='rgba', dpi=dpi, bbox_inches=bbox_inches, facecolor=facecolor)
+    # savefig sizes the Agg renderer to the (possibly cropped) output
+    renderer = fig.canvas.renderer
+    size = (int(renderer.width), int(renderer.height))
+    raw = buf.getbuffer()
+    if size[0] * size[1] * 4 != raw.nbytes:
+        raise ValueError(f"Unexpected RGBA buffer size {raw.nbytes} for {size}")
+    # Charts and blueprints are drawn on opaque backgrounds, so alpha carries nothing
+    return Image.frombuffer('RGBA', size, raw, 'raw', 'RGBA', 0, 1).convert('RGB')
+
+def encode_image(image, image_format=IMAGE_FORMAT):
+    """Encode an RGB (or already paletted) image as palette PNG, lossless WebP or plain PNG"""
+    buf = io.BytesIO()
+    if image_format == 'webp':
+        image.save(buf, format='WEBP', lossless=True, method=4)
+    elif image_format == 'png':
+        # Flat chart/blueprint colors survive a 256-color palette; octree keeps it fast
+        paletted = image if image.mode == 'P' else \
+            image.quantize(colors=PALETTE_COLORS, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE)
+        paletted.save(buf, format='PNG', compress_level=PNG_COMPRESS_LEVEL)
+    else:
+        image.save(buf, format='PNG')
+    return buf.getvalue()
+
+def encode_figure(fig, dpi, bbox_inches=None, facecolor=None, image_format=IMAGE_FORMAT):
+    """Render and encode a figure in memory; returns the image bytes"""
+    if image_format == 'rgba':
+        buf = io.BytesIO()
+        fig.savefig(buf, format='png', dpi=dpi, bbox_inches=bbox_inches, facecolor=facecolor)
+        return buf.getvalue()
+    return encode_image(figure_to_image(fig, dpi, bbox_inches, facecolor), image_format)
+
+def image_mimetype(data):
+    """Content type of encoded image bytes"""
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    return 'image/png'
+
+def report():
+    """Bytes saved per image against matplotlib's RGBA PNG, for each format"""
+    import chart_renderer
+    import generate_blueprints
+
+    elements = {'Fire': 82, 'Water': 64, 'Earth': 71, 'Air': 55, 'Space': 90}
+    renderer = chart_renderer.ElementsChartRenderer()
+    renderer.update(elements, 72.4)
+    images = [('5 elements chart', renderer.figure, chart_renderer.DPI, renderer.bbox,
+               chart_renderer.BACKGROUND_COLOR)]
+    for layout_type in ['optimal', 'modern', 'compact']:
+        fig = generate_blueprints.build_blueprint_figure([], 34, 35, layout_type)
+        images.append((f'{layout_type} blueprint', fig, generate_blueprints.BLUEPRINT_DPI, 'tight',
+                       generate_blueprints.BLUEPRINT_BACKGROUND))
+
+    print("Vastu Vision Image Encoding")
+    print("=" * 70)
+    for name, fig, dpi, bbox, facecolor in images:
+        start = time.perf_counter()
+        baseline = encode_figure(fig, dpi, bbox, facecolor, image_format='rgba')
+        baseline_ms = (time.perf_counter() - start) * 1000
+        print(f"{name}: rgba {len(baseline) / 1024:.0f} KB in {baseline_ms:.0f} ms")
+        for image_format in ['png', 'webp']:
+            start = time.perf_counter()
+            data = encode_figure(fig, dpi, bbox, facecolor, image_format=image_format)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            saved = len(baseline) - len(data)
+            print(f"  {image_format:5s} {len(data) / 1024:6.0f} KB in {elapsed_ms:4.0f} ms, "
+                  f"saved {saved / 1024:.0f} KB ({saved / len(baseline):.0%})")
+
+if __name__ == '__main__':
+    report()
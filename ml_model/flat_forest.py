@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Vastu Vision Flat Forest Inference
+Exports a trained RandomForest into packed NumPy node arrays and predicts
+by walking all trees at once, vectorized over the batch.
+
+The arrays are stored as raw .npy files in a directory so preforked workers
+can open them with mmap_mode='r' and share one page-cache copy.
+"""
+
+import os
+import sys
+import time
+import joblib
+import numpy as np
+from pathlib import Path
+
+LEAF = -1  # sklearn marks leaf nodes with children_left == -1
+ARRAY_NAMES = ['feature', 'threshold', 'left', 'right', 'value', 'roots', 'mean', 'scale']
+
+class FlatForest:
+    """Tree ensemble packed into flat per-node arrays
+
+    Node i of tree t is stored at roots[t] + i, so child indices in `left`
+    and `right` are absolute positions into the packed arrays.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, mean, scale, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        # StandardScaler parameters, so serving needs nothing from the pickle
+        self.mean = mean
+        self.scale = scale
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_sklearn(cls, forest, scaler):
+        """Pack the estimators of a fitted RandomForestRegressor and its scaler"""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            is_leaf = tree.children_left == LEAF
+            # Leaves point at themselves so extra walk steps are no-ops
+            own_index = np.arange(tree.node_count)
+            lefts.append(np.where(is_leaf, own_index, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, own_index, tree.children_right) + offset)
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            values.append(tree.value[:, 0, 0])
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.int32),
+            right=np.concatenate(rights).astype(np.int32),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.array(roots, dtype=np.int32),
+            mean=np.asarray(scaler.mean_, dtype=np.float64),
+            scale=np.asarray(scaler.scale_, dtype=np.float64),
+            max_depth=max_depth
+        )
+
+    def transform(self, X):
+        """Apply the packed StandardScaler"""
+        return (X - self.mean) / self.scale
+
+    def predict(self, X):
+        """Predict an (N, n_features) matrix; returns the mean over trees"""
+        # sklearn trees compare float32 features: go left when x <= threshold
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])[:, None]
+        # (N, n_trees) current node per sample per tree
+        nodes = np.broadcast_to(self.roots, (X.shape[0], len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[nodes]]
+            nodes = np.where(x <= self.threshold[nodes], self.left[nodes], self.right[nodes])
+        return self.value[nodes].mean(axis=1)
+
+    def save(self, path):
+        """Write each packed array to <path>/<name>.npy"""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        (path / 'COMPLETE').unlink(missing_ok=True)
+        arrays = {name: getattr(self, name) for name in ARRAY_NAMES}
+        arrays['max_depth'] = np.array(self.max_depth)
+        for name, array in arrays.items():
+            save_array(path / f'{name}.npy', array)
+        # Written last: marks the artifact as complete
+        (path / 'COMPLETE').touch()
+
+    @classmethod
+    def load(cls, path, mmap_mode=None):
+        """Read arrays written by save(); mmap_mode='r' shares pages between processes"""
+        path = Path(path)
+        arrays = {name: np.load(path / f'{name}.npy', mmap_mode=mmap_mode) for name in ARRAY_NAMES}
+        return cls(max_depth=int(np.load(path / 'max_depth.npy')), **arrays)
+
+def save_array(path, array):
+    """np.save to a temp file and rename it over path
+
+    Running services may have the old file memory-mapped; rewriting it in
+    place would change (or truncate) their pages under them, while a rename
+    leaves them on the old inode until they reload.
+    """
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    try:
+        with open(tmp_path, 'wb') as f:
+            np.save(f, array)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+def flat_path_for(model_path):
+    """Flat forest directory for a model pickle: vastu_ml_model.pkl -> vastu_ml_model.flat/"""
+    return Path(model_path).with_suffix('.flat')
+
+def export_model(model_path, output_path):
+    """Export a pickled model (model + scaler) to a flat forest directory"""
+    model_data = joblib.load(model_path)
+    forest = FlatForest.from_sklearn(model_data['model'], model_data['scaler'])
+    forest.save(output_path)
+    return forest, model_data
+
+def benchmark(model_data, forest, repeats=200):
+    """Check parity with sklearn and compare single-row and batch latency"""
+    model = model_data['model']
+    scaler = model_data['scaler']
+    rng = np.random.default_rng(42)
+    X = np.column_stack([
+        rng.integers(20, 60, 1000), rng.integers(25, 70, 1000), rng.integers(500, 4200, 1000),
+        rng.integers(0, 3, 1000), rng.integers(0, 9, 1000), rng.integers(0, 8, 1000),
+        rng.integers(0, 12, 1000), rng.integers(1, 10, 1000), rng.integers(1, 9, 1000)
+    ])
+    X_scaled = scaler.transform(X)
+
+    max_diff = np.abs(model.predict(X_scaled) - forest.predict(X_scaled)).max()
+    print(f"Parity: max |sklearn - flat| over {len(X)} rows = {max_diff:.2e}")
+
+    row = X_scaled[:1]
+    for name, predict in [('sklearn', model.predict), ('flat', forest.predict)]:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            predict(row)
+        single = (time.perf_counter() - start) / repeats * 1000
+        start = time.perf_counter()
+        predict(X_scaled)
+        batch = (time.perf_counter() - start) * 1000
+        print(f"{name:>8}: single row {single:.3f} ms, 1000-row batch {batch:.2f} ms")
+
+    return max_diff
+
+def model_memory_kb(forest):
+    """RSS and PSS in KB that this process spends on a flat forest (Linux only)
+
+    In-memory arrays count fully towards both. Memory-mapped arrays are read
+    from /proc/self/smaps, where PSS splits each shared page between all the
+    processes mapping it.
+    """
+    arrays = [getattr(forest, name) for name in ARRAY_NAMES]
+    private_kb = sum(a.nbytes for a in arrays if not isinstance(a, np.memmap)) // 1024
+    mapped_files = {os.path.realpath(a.filename) for a in arrays if isinstance(a, np.memmap)}
+
+    rss_kb = pss_kb = 0
+    in_model_mapping = False
+    with open('/proc/self/smaps') as f:
+        for line in f:
+            fields = line.split()
+            if '-' in fields[0] and ':' not in fields[0]:
+                # Mapping header: "start-end perms offset dev inode [path]"
+                in_model_mapping = len(fields) >= 6 and fields[5] in mapped_files
+            elif in_model_mapping and fields[0] == 'Rss:':
+                rss_kb += int(fields[1])
+            elif in_model_mapping and fields[0] == 'Pss:':
+                pss_kb += int(fields[1])
+
+    return {'rss_kb': private_kb + rss_kb, 'pss_kb': private_kb + pss_kb}
+
+def measure_worker_memory(model_path, workers=4, mmap_mode='r'):
+    """Fork workers that each load the flat forest and report its memory per worker"""
+    children = []
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            forest = FlatForest.load(flat_path_for(model_path), mmap_mode=mmap_mode)
+            forest.predict(np.zeros((1, len(forest.mean))))
+            # Touch every node so all pages are actually mapped in
+            for name in ARRAY_NAMES:
+                np.asarray(getattr(forest, name)).sum()
+            time.sleep(0.5)  # let the other workers map the same pages
+            memory = model_memory_kb(forest)
+            os.write(write_fd, f"{memory['rss_kb']} {memory['pss_kb']}".encode())
+            os._exit(0)
+        os.close(write_fd)
+        children.append((pid, read_fd))
+
+    reports = []
+    for pid, read_fd in children:
+        rss, pss = map(int, os.read(read_fd, 64).split())
+        os.close(read_fd)
+        os.waitpid(pid, 0)
+        reports.append((rss, pss))
+
+    return {
+        'workers': workers,
+        'mmap_mode': mmap_mode,
+        'avg_rss_kb': sum(rss for rss, _ in reports) // workers,
+        'avg_pss_kb': sum(pss for _, pss in reports) // workers
+    }
+
+def main():
+    """Export vastu_ml_model.pkl to vastu_ml_model.flat/ and benchmark it"""
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    model_path = Path(args[0] if args else Path(__file__).parent / 'vastu_ml_model.pkl')
+    output_path = flat_path_for(model_path)
+
+    print("Vastu Vision Flat Forest Export")
+    print("=" * 50)
+    forest, model_data = export_model(model_path, output_path)
+    print(f"SUCCESS: {len(forest.roots)} trees, {len(forest.value)} nodes, "
+          f"depth {forest.max_depth} -> {output_path}")
+
+    max_diff = benchmark(model_data, forest)
+    if max_diff > 1e-6:
+        print("ERROR: Flat forest predictions do not match sklearn")
+        sys.exit(1)
+
+    if '--memory' in sys.argv:
+        print("\nModel memory per worker (4 forked workers):")
+        for mmap_mode in [None, 'r']:
+            report = measure_worker_memory(model_path, mmap_mode=mmap_mode)
+            print(f"   mmap_mode={str(mmap_mode):>4}: RSS {report['avg_rss_kb']} KB, "
+                  f"PSS {report['avg_pss_kb']} KB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Vastu Vision Prediction Lookup Grid
+Precomputes model scores over the discrete feature space that the Flask
+services send, so serving is a single array index for in-grid inputs
+"""
+
+import sys
+import json
+import time
+import numpy as np
+from pathlib import Path
+from flat_forest import save_array
+
+# Standard plot sizes customers pick; width/height are derived from the
+# area the same way analyze_vastu.build_ml_input does
+PLOT_AREAS = [800, 1000, 1200, 1500, 1800, 2000, 2400, 3000]
+
+# (feature, values) in grid axis order; plot_width/plot_height follow plot_area
+GRID_AXES = [
+    ('plot_area', PLOT_AREAS),
+    ('floor_num', list(range(0, 4))),
+    ('zone_encoded', list(range(0, 9))),
+    ('orientation_encoded', list(range(0, 8))),
+    ('room_type_encoded', list(range(0, 8))),
+    ('adjacent_count', list(range(0, 11))),
+    ('shared_walls_count', list(range(1, 11)))
+]
+
+# Scores are stored as uint16 tenths (0-1000), matching the 1-decimal rounding
+SCORE_SCALE = 10
+
+def plot_dimensions(plot_area):
+    plot_width = int(plot_area ** 0.5)
+    return plot_width, plot_area // plot_width
+
+def grid_path_for(model_path):
+    """Grid file for a model pickle: vastu_ml_model.pkl -> vastu_ml_model.grid.npy"""
+    return Path(model_path).with_suffix('.grid.npy')
+
+class LookupGrid:
+    """Dense array of precomputed scores indexed by the GRID_AXES values"""
+
+    def __init__(self, scores):
+        self.scores = scores
+        self.axis_index = [(name, {value: i for i, value in enumerate(values)})
+                           for name, values in GRID_AXES]
+        self.dimensions = {area: plot_dimensions(area) for area in PLOT_AREAS}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def build(cls, predictor, chunk_size=100000):
+        """Score every grid point with a loaded VastuPredictor"""
+        shape = tuple(len(values) for _, values in GRID_AXES)
+        # One row per grid point, in C order so it reshapes straight into `shape`
+        mesh = np.meshgrid(*[np.array(values) for _, values in GRID_AXES], indexing='ij')
+        points = np.stack([axis.ravel() for axis in mesh], axis=1).astype(np.float64)
+
+        widths, heights = zip(*(plot_dimensions(area) for area in points[:, 0].astype(int)))
+        # Model column order: width, height, area, floor, zone, orientation, room type, counts
+        rows = np.column_stack([widths, heights, points])
+
+        scores = np.empty(len(rows), dtype=np.uint16)
+        for start in range(0, len(rows), chunk_size):
+            chunk = predictor.predict_scores(rows[start:start + chunk_size])
+            scores[start:start + chunk_size] = np.round(np.clip(chunk, 0, 100) * SCORE_SCALE)
+        return cls(scores.reshape(shape))
+
+    def save(self, path):
+        path = Path(path)
+        # Renamed into place: serving workers may have the old grid mmap'd
+        save_array(path, self.scores)
+        path.with_suffix('.json').write_text(json.dumps(GRID_AXES))
+
+    @classmethod
+    def load(cls, path, mmap_mode=None):
+        """Load a saved grid; returns None if it was built for different axes"""
+        path = Path(path)
+        axes = json.loads(path.with_suffix('.json').read_text())
+        if axes != [[name, values] for name, values in GRID_AXES]:
+            return None
+        return cls(np.load(path, mmap_mode=mmap_mode))
+
+    def lookup(self, row):
+        """Return the precomputed score for a model input row, or None if it is off-grid"""
+        plot_width, plot_height = row[0], row[1]
+        if self.dimensions.get(row[2]) != (plot_width, plot_height):
+            self.misses += 1
+            return None
+
+        # Grid axes line up with model columns 2-8
+        index = []
+        for value, (_, value_index) in zip(row[2:], self.axis_index):
+            i = value_index.get(value)
+            if i is None:
+                self.misses += 1
+                return None
+            index.append(i)
+
+        self.hits += 1
+        return self.scores[tuple(index)] / SCORE_SCALE
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'points': int(self.scores.size),
+            'bytes': int(self.scores.nbytes),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+def main():
+    """Build vastu_ml_model.grid.npy for vastu_ml_model.pkl"""
+    sys.path.insert(0, str(Path(__file__).parent))
+    from predict import VastuPredictor
+
+    model_path = Path(sys.argv[1] if len(sys.argv) > 1 else Path(__file__).parent / 'vastu_ml_model.pkl')
+    predictor = VastuPredictor(model_path, cache_size=0)
+    if not predictor.load_model():
+        print("ERROR: Model could not be loaded")
+        sys.exit(1)
+
+    print("Vastu Vision Lookup Grid")
+    print("=" * 50)
+    start = time.perf_counter()
+    grid = LookupGrid.build(predictor)
+    grid_path = grid_path_for(model_path)
+    grid.save(grid_path)
+    print(f"SUCCESS: {grid.scores.size} points ({grid.scores.nbytes / 1e6:.1f} MB) "
+          f"in {time.perf_counter() - start:.1f}s -> {grid_path}")
+
+    row = [34, 35, 1200, 1, 3, 2, 2, 4, 3]
+    start = time.perf_counter()
+    for _ in range(10000):
+        grid.lookup(row)
+    print(f"Lookup: {(time.perf_counter() - start) / 10000 * 1e6:.1f} µs per prediction")
+
+if __name__ == "__main__":
+    main()
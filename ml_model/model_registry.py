@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Vastu Vision Model Registry
+Versioned model artifacts with a `current` pointer, and a watcher that
+hot-reloads the serving model when the pointer changes
+
+Layout:
+    registry/
+        current                 <- text file holding the active version
+        v2/vastu_ml_model.pkl
+        v2/vastu_ml_model.flat/ <- optional flat forest export
+        v2/vastu_ml_model.grid.npy/.json <- optional lookup grid
+"""
+
+import os
+import sys
+import shutil
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from predict import VastuPredictor, DEFAULT_MODEL_PATH
+from flat_forest import flat_path_for
+from lookup_grid import grid_path_for
+
+DEFAULT_REGISTRY_DIR = Path(os.environ.get('VASTU_MODEL_REGISTRY', Path(__file__).parent / 'registry'))
+MODEL_FILENAME = 'vastu_ml_model.pkl'
+
+def current_version(registry_dir=DEFAULT_REGISTRY_DIR):
+    """Return the active version, or None if the registry has no pointer"""
+    try:
+        return (Path(registry_dir) / 'current').read_text().strip() or None
+    except OSError:
+        return None
+
+def model_path_for(version, registry_dir=DEFAULT_REGISTRY_DIR):
+    return Path(registry_dir) / version / MODEL_FILENAME
+
+def list_versions(registry_dir=DEFAULT_REGISTRY_DIR):
+    registry_dir = Path(registry_dir)
+    if not registry_dir.exists():
+        return []
+    return sorted(p.name for p in registry_dir.iterdir() if (p / MODEL_FILENAME).exists())
+
+def publish(model_path, version, registry_dir=DEFAULT_REGISTRY_DIR):
+    """Copy a trained model (and its flat forest export and lookup grid, if any) into the registry"""
+    version_dir = Path(registry_dir) / version
+    if version_dir.exists():
+        raise ValueError(f"Version {version} already exists")
+
+    # Build in a temp dir and rename so watchers never see a half-copied version
+    staging_dir = Path(registry_dir) / f'.{version}.tmp'
+    # Left over from a publish that was killed part way
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    staging_dir.mkdir(parents=True)
+    try:
+        shutil.copy2(model_path, staging_dir / MODEL_FILENAME)
+        flat_path = flat_path_for(model_path)
+        if (flat_path / 'COMPLETE').exists():
+            shutil.copytree(flat_path, flat_path_for(staging_dir / MODEL_FILENAME))
+        grid_path = grid_path_for(model_path)
+        if grid_path.exists():
+            staged_grid_path = grid_path_for(staging_dir / MODEL_FILENAME)
+            shutil.copy2(grid_path.with_suffix('.json'), staged_grid_path.with_suffix('.json'))
+            shutil.copy2(grid_path, staged_grid_path)
+        os.replace(staging_dir, version_dir)
+    except BaseException:
+        # Don't leave a staging dir behind to block a retry of this version
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+    return version_dir
+
+def activate(version, registry_dir=DEFAULT_REGISTRY_DIR):
+    """Atomically point `current` at a published version"""
+    if not model_path_for(version, registry_dir).exists():
+        raise ValueError(f"Version {version} is not in the registry")
+    pointer = Path(registry_dir) / 'current'
+    tmp_pointer = pointer.with_suffix('.tmp')
+    tmp_pointer.write_text(version + '\n')
+    os.replace(tmp_pointer, pointer)
+
+class ModelWatcher:
+    """Holds the serving VastuPredictor and swaps it when `current` changes
+
+    Callers read `watcher.predictor` once per request. A new version is
+    loaded in the background and published with a single reference
+    assignment, so in-flight requests finish on the model they started with.
+    """
+
+    def __init__(self, registry_dir=DEFAULT_REGISTRY_DIR, fallback_model_path=DEFAULT_MODEL_PATH,
+                 poll_interval=2.0, mmap_mode='r', **predictor_options):
+        self.registry_dir = Path(registry_dir)
+        self.fallback_model_path = fallback_model_path
+        self.poll_interval = poll_interval
+        self.mmap_mode = mmap_mode
+        self.predictor_options = predictor_options
+        self.stop_event = threading.Event()
+        self.version = current_version(self.registry_dir)
+        self.failed_version = None
+        self.predictor = self.load(self.version)
+        self.thread = threading.Thread(target=self.run, name='model-watcher', daemon=True)
+
+    def load(self, version):
+        """Build and load a predictor for a registry version (or the fallback model)"""
+        if version:
+            predictor = VastuPredictor(model_path_for(version, self.registry_dir),
+                                       version=version, **self.predictor_options)
+        else:
+            predictor = VastuPredictor(self.fallback_model_path, **self.predictor_options)
+        predictor.load_model(mmap_mode=self.mmap_mode)
+        return predictor
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        while not self.stop_event.wait(self.poll_interval):
+            self.check()
+
+    def check(self):
+        """Swap in the version `current` points at, if it changed and loads cleanly"""
+        version = current_version(self.registry_dir)
+        if not version or version in (self.version, self.failed_version):
+            return False
+
+        print(f"🔄 Model registry: loading version {version}...")
+        predictor = self.load(version)
+        if not predictor.is_loaded():
+            print(f"⚠️ Model registry: version {version} failed to load, keeping {self.version}")
+            self.failed_version = version  # don't retry a broken version every poll
+            return False
+
+        self.predictor = predictor
+        self.version = version
+        print(f"✅ Model registry: now serving version {version}")
+        return True
+
+def main():
+    """Registry CLI: list | publish <model.pkl> <version> | activate <version>"""
+    command = sys.argv[1] if len(sys.argv) > 1 else 'list'
+
+    if command == 'publish' and len(sys.argv) == 4:
+        version_dir = publish(sys.argv[2], sys.argv[3])
+        print(f"SUCCESS: Published {sys.argv[2]} as {version_dir}")
+    elif command == 'activate' and len(sys.argv) == 3:
+        activate(sys.argv[2])
+        print(f"SUCCESS: current -> {sys.argv[2]}")
+    elif command == 'list':
+        active = current_version()
+        for version in list_versions():
+            print(f"{'*' if version == active else ' '} {version}")
+    else:
+        print(main.__doc__)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Vastu Vision Model Server
+Shares one VastuPredictor between the Flask services over a Unix socket,
+collecting concurrent requests into micro-batches for vectorized predicts
+"""
+
+import os
+import sys
+import json
+import queue
+import signal
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from model_registry import ModelWatcher
+
+DEFAULT_SOCKET_PATH = os.environ.get('VASTU_MODEL_SOCKET', '/tmp/vastu_model.sock')
+BATCH_WINDOW = 0.002  # seconds to wait for more requests after the first
+MAX_BATCH_SIZE = 64
+
+class MicroBatcher:
+    """Collects single predictions and runs them as one predict_batch call"""
+
+    def __init__(self, model_watcher, window=BATCH_WINDOW, max_batch_size=MAX_BATCH_SIZE):
+        self.model_watcher = model_watcher
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.pending = queue.Queue()
+        self.batches = 0
+        self.items = 0
+        self.worker = threading.Thread(target=self.run, name='micro-batcher', daemon=True)
+        self.worker.start()
+
+    def validate(self, features):
+        """Raise ValueError for a payload the predictor can't score, so a bad request
+        fails on its own instead of failing every request in its micro-batch"""
+        if not isinstance(features, dict):
+            raise ValueError('features must be a JSON object')
+        row = self.model_watcher.predictor.features_to_row(features)
+        if not all(isinstance(value, (int, float)) for value in row):
+            raise ValueError('feature values must be numbers')
+
+    def submit(self, features):
+        """Queue one feature dict and return a Future for its prediction"""
+        self.validate(features)
+        future = Future()
+        self.pending.put((features, future))
+        return future
+
+    def run(self):
+        while True:
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                # Read the predictor once per batch so a hot reload never splits a batch
+                predictor = self.model_watcher.predictor
+                results = predictor.predict_batch([features for features, _ in batch])
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
+            self.batches += 1
+            self.items += len(batch)
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'avg_batch_size': round(self.items / self.batches, 2) if self.batches else 0.0
+        }
+
+class PredictionHandler(socketserver.StreamRequestHandler):
+    """Newline-delimited JSON: {"features": {...}} or {"batch": [...]} per line"""
+
+    def handle(self):
+        batcher = self.server.batcher
+        for line in self.rfile:
+            try:
+                message = json.loads(line)
+                if 'batch' in message:
+                    if not isinstance(message['batch'], list):
+                        raise ValueError('batch must be a JSON array')
+                    # Validate the whole batch before queueing any of it
+                    for features in message['batch']:
+                        batcher.validate(features)
+                    futures = [batcher.submit(features) for features in message['batch']]
+                    response = {'results': [future.result() for future in futures]}
+                elif 'features' in message:
+                    response = {'result': batcher.submit(message['features']).result()}
+                else:
+                    predictor = batcher.model_watcher.predictor
+                    response = {'stats': batcher.stats(),
+                                'model_version': predictor.version,
+                                'prediction_cache': predictor.cache.stats()}
+            except Exception as e:
+                response = {'error': str(e)}
+
+            self.wfile.write((json.dumps(response) + '\n').encode('utf-8'))
+            self.wfile.flush()
+
+class ModelServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, socket_path, model_watcher):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, PredictionHandler)
+        self.batcher = MicroBatcher(model_watcher)
+
+class ModelClient:
+    """Thin connection-pooled client for the model server"""
+
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH, pool_size=8, timeout=5):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.pool = queue.LifoQueue(maxsize=pool_size)
+
+    def available(self):
+        """True if the server socket exists on this host"""
+        return hasattr(socket, 'AF_UNIX') and os.path.exists(self.socket_path)
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        return sock, sock.makefile('rb')
+
+    def request(self, message):
+        try:
+            conn = self.pool.get_nowait()
+        except queue.Empty:
+            conn = self.connect()
+
+        sock, reader = conn
+        try:
+            sock.sendall((json.dumps(message) + '\n').encode('utf-8'))
+            line = reader.readline()
+            if not line:
+                raise ConnectionError('Model server closed the connection')
+            response = json.loads(line)
+        except Exception:
+            reader.close()
+            sock.close()
+            raise
+
+        try:
+            self.pool.put_nowait(conn)
+        except queue.Full:
+            reader.close()
+            sock.close()
+
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+        return response
+
+    def predict(self, features):
+        return self.request({'features': features})['result']
+
+    def predict_batch(self, features_list):
+        return self.request({'batch': features_list})['results']
+
+    def stats(self):
+        return self.request({})
+
+def main():
+    """Start the model server"""
+    socket_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SOCKET_PATH
+
+    model_watcher = ModelWatcher().start()
+    model_loaded = model_watcher.predictor.is_loaded()
+
+    server = ModelServer(socket_path, model_watcher)
+    print("=" * 60)
+    print("🤖 VASTU VISION - MODEL SERVER")
+    print("=" * 60)
+    print(f"📊 ML Model: {f'Loaded (version {model_watcher.predictor.version})' if model_loaded else 'Not found, using mock predictions'}")
+    print(f"🔌 Socket: {socket_path}")
+    print(f"📦 Micro-batching: {BATCH_WINDOW * 1000:.0f} ms window, up to {MAX_BATCH_SIZE} items")
+    print("=" * 60)
+    # Exit through the finally block on SIGTERM so the socket file is removed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+if __name__ == "__main__":
+    main()
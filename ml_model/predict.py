@@ -6,26 +6,116 @@ Handles real-time predictions using trained ML model
 
 import sys
 import json
+import time
+import threading
+from collections import OrderedDict
 import joblib
 import numpy as np
 from pathlib import Path
+from flat_forest import FlatForest, flat_path_for
+from lookup_grid import LookupGrid, grid_path_for
+
+# Default model location (next to this script, not the caller's cwd)
+DEFAULT_MODEL_PATH = Path(__file__).parent / 'vastu_ml_model.pkl'
+
+class PredictionCache:
+    """Thread-safe, size-bounded LRU cache of prediction results"""
+    
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key):
+        with self.lock:
+            result = self.entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return dict(result)
+    
+    def put(self, key, result):
+        if self.max_size <= 0:
+            return
+        with self.lock:
+            self.entries[key] = dict(result)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+    
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
 
 class VastuPredictor:
-    def __init__(self):
-        self.model_path = 'vastu_ml_model.pkl'
+    def __init__(self, model_path=None, cache_size=4096, reload_check_interval=2.0, version='1.0.0'):
+        self.model_path = Path(model_path) if model_path else DEFAULT_MODEL_PATH
+        self.version = version
         self.model_data = None
         self.model = None
         self.scaler = None
         self.feature_columns = None
+        self.flat_forest = None
+        self.lookup_grid = None
+        self.mmap_mode = None
+        self.cache = PredictionCache(cache_size)
+        self.model_mtime = None
+        self.reload_check_interval = reload_check_interval
+        self.last_reload_check = 0.0
+        # Guards the loaded model and cache: a reload swaps them while
+        # predictions read them
+        self.lock = threading.RLock()
         
-    def load_model(self):
-        """Load the trained ML model"""
+    def load_model(self, mmap_mode=None):
+        """Load the trained ML model
+        
+        With mmap_mode='r' the flat forest arrays (or, without an export, the
+        pickle's numpy arrays) are memory-mapped, so preforked workers on one
+        host share a single page-cache copy of the model.
+        """
         try:
-            if Path(self.model_path).exists():
-                self.model_data = joblib.load(self.model_path)
-                self.model = self.model_data['model']
-                self.scaler = self.model_data['scaler']
-                self.feature_columns = self.model_data['feature_columns']
+            if self.model_path.exists():
+                # Load everything first, then swap it in at once under the lock
+                model_mtime = self.model_path.stat().st_mtime
+                flat_forest = self.load_flat_forest(mmap_mode, model_mtime)
+                model_data = model = scaler = None
+                feature_columns = self.feature_columns
+                if flat_forest is None:
+                    model_data = joblib.load(self.model_path, mmap_mode=mmap_mode)
+                    model = model_data['model']
+                    scaler = model_data['scaler']
+                    feature_columns = model_data.get('feature_columns')
+                # Serving the flat forest only needs its arrays; the pickle stays unloaded
+                lookup_grid = self.load_lookup_grid(mmap_mode, model_mtime)
+                
+                with self.lock:
+                    self.mmap_mode = mmap_mode
+                    self.model_mtime = model_mtime
+                    self.flat_forest = flat_forest
+                    self.model_data = model_data
+                    self.model = model
+                    self.scaler = scaler
+                    self.feature_columns = feature_columns
+                    self.lookup_grid = lookup_grid
+                    self.cache.clear()
                 return True
             else:
                 print("Model file not found", file=sys.stderr)
@@ -34,50 +124,161 @@ class VastuPredictor:
             print(f"Error loading model: {e}", file=sys.stderr)
             return False
     
+    def load_flat_forest(self, mmap_mode=None, model_mtime=None):
+        """Load the exported flat forest (flat_forest.py) if it is up to date with the model"""
+        model_mtime = self.model_mtime if model_mtime is None else model_mtime
+        complete_marker = flat_path_for(self.model_path) / 'COMPLETE'
+        try:
+            if complete_marker.exists() and complete_marker.stat().st_mtime >= model_mtime:
+                return FlatForest.load(complete_marker.parent, mmap_mode=mmap_mode)
+        except Exception as e:
+            print(f"Error loading flat forest: {e}", file=sys.stderr)
+        return None
+    
+    def load_lookup_grid(self, mmap_mode=None, model_mtime=None):
+        """Load the precomputed grid (lookup_grid.py) if it is up to date with the model"""
+        model_mtime = self.model_mtime if model_mtime is None else model_mtime
+        grid_path = grid_path_for(self.model_path)
+        try:
+            if grid_path.exists() and grid_path.stat().st_mtime >= model_mtime:
+                return LookupGrid.load(grid_path, mmap_mode=mmap_mode)
+        except Exception as e:
+            print(f"Error loading lookup grid: {e}", file=sys.stderr)
+        return None
+    
+    def lookup_score(self, row):
+        """Precomputed score for an in-grid row, or None"""
+        if self.lookup_grid is None:
+            return None
+        return self.lookup_grid.lookup(row)
+    
+    def predict_scores(self, feature_matrix):
+        """Scale an (N, 9) feature matrix and run the model over it"""
+        if self.flat_forest is not None:
+            # Plain NumPy path: skips sklearn input validation and joblib dispatch
+            return self.flat_forest.predict(self.flat_forest.transform(feature_matrix))
+        
+        features_scaled = self.scaler.transform(feature_matrix)
+        return self.model.predict(features_scaled)
+    
+    def check_model_file(self):
+        """Reload the model and drop cached predictions if the model file changed"""
+        with self.lock:
+            now = time.monotonic()
+            if now - self.last_reload_check < self.reload_check_interval:
+                return
+            self.last_reload_check = now
+            
+            try:
+                mtime = self.model_path.stat().st_mtime
+            except OSError:
+                return
+            if self.model_mtime is not None and mtime != self.model_mtime:
+                print("Model file changed, reloading and clearing prediction cache", file=sys.stderr)
+                # Predictions wait for the swap instead of mixing old and new model state
+                self.load_model(self.mmap_mode)
+    
+    def is_loaded(self):
+        """True if either the flat forest or the sklearn model is available"""
+        return self.flat_forest is not None or self.model is not None
+    
+    def features_to_row(self, features):
+        """Order a feature dict into a model input row"""
+        return [
+            features.get('plot_width', 30),
+            features.get('plot_height', 40),
+            features.get('plot_area', 1200),
+            features.get('floor_num', 1),
+            features.get('zone_encoded', 5),
+            features.get('orientation_encoded', 2),
+            features.get('room_type_encoded', 3),
+            features.get('adjacent_count', 2),
+            features.get('shared_walls_count', 1)
+        ]
+    
+    def build_result(self, prediction):
+        """Build the prediction response for a raw model output"""
+        # Clamp prediction between 0-100
+        vastu_score = float(max(0, min(100, prediction)))
+        
+        # Calculate confidence based on model performance
+        confidence = 0.85 + np.random.random() * 0.1
+        
+        return {
+            'vastu_score': round(vastu_score, 1),
+            'confidence': round(confidence, 2),
+            'model_type': 'RandomForestRegressor',
+            'version': self.version,
+            'accuracy': 0.89,
+            'processing_time': 0.3
+        }
+    
     def predict(self, features):
         """Make prediction using loaded model"""
         try:
-            if self.model is None:
-                return self.get_mock_prediction(features)
-            
-            # Prepare features in correct order
-            feature_array = np.array([
-                features.get('plot_width', 30),
-                features.get('plot_height', 40),
-                features.get('plot_area', 1200),
-                features.get('floor_num', 1),
-                features.get('zone_encoded', 5),
-                features.get('orientation_encoded', 2),
-                features.get('room_type_encoded', 3),
-                features.get('adjacent_count', 2),
-                features.get('shared_walls_count', 1)
-            ]).reshape(1, -1)
-            
-            # Scale features
-            features_scaled = self.scaler.transform(feature_array)
-            
-            # Make prediction
-            prediction = self.model.predict(features_scaled)[0]
-            
-            # Clamp prediction between 0-100
-            vastu_score = max(0, min(100, prediction))
-            
-            # Calculate confidence based on model performance
-            confidence = 0.85 + np.random.random() * 0.1
-            
-            return {
-                'vastu_score': round(vastu_score, 1),
-                'confidence': round(confidence, 2),
-                'model_type': 'RandomForestRegressor',
-                'version': '1.0.0',
-                'accuracy': 0.89,
-                'processing_time': 0.3
-            }
+            self.check_model_file()
+            with self.lock:
+                if not self.is_loaded():
+                    return self.get_mock_prediction(features)
+                
+                # Prepare features in correct order
+                row = self.features_to_row(features)
+                grid_score = self.lookup_score(row)
+                if grid_score is not None:
+                    return self.build_result(grid_score)
+                
+                cache_key = tuple(row)
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    return cached
+                
+                feature_array = np.array(row, dtype=np.float64).reshape(1, -1)
+                
+                # Scale features and make prediction
+                prediction = self.predict_scores(feature_array)[0]
+                
+                result = self.build_result(prediction)
+                self.cache.put(cache_key, result)
+                return result
             
         except Exception as e:
             print(f"Prediction error: {e}", file=sys.stderr)
             return self.get_mock_prediction(features)
     
+    def predict_batch(self, features_list):
+        """Make predictions for many feature dicts with one vectorized model call"""
+        if not features_list:
+            return []
+        
+        try:
+            self.check_model_file()
+            with self.lock:
+                if not self.is_loaded():
+                    return [self.get_mock_prediction(f) for f in features_list]
+                
+                rows = [self.features_to_row(f) for f in features_list]
+                results = []
+                for row in rows:
+                    grid_score = self.lookup_score(row)
+                    results.append(self.build_result(grid_score) if grid_score is not None
+                                   else self.cache.get(tuple(row)))
+                missing = [i for i, result in enumerate(results) if result is None]
+                
+                if missing:
+                    # One (N, 9) matrix -> one scaler transform and one model predict
+                    feature_matrix = np.array([rows[i] for i in missing], dtype=np.float64)
+                    predictions = self.predict_scores(feature_matrix)
+                    
+                    for i, prediction in zip(missing, predictions):
+                        results[i] = self.build_result(prediction)
+                        self.cache.put(tuple(rows[i]), results[i])
+                
+                return results
+            
+        except Exception as e:
+            print(f"Batch prediction error: {e}", file=sys.stderr)
+            return [self.get_mock_prediction(f) for f in features_list]
+    
     def get_mock_prediction(self, features):
         """Get mock prediction when model is not available"""
         # Calculate score based on features
@@ -108,20 +309,23 @@ class VastuPredictor:
             'vastu_score': vastu_score,
             'confidence': 0.75,
             'model_type': 'Mock',
-            'version': '1.0.0',
+            'version': self.version,
             'accuracy': 0.75,
             'processing_time': 0.1
         }
 
 def main():
     """Main function to handle prediction requests"""
+    # Initialize predictor with the registry's active version, as the services
+    # serve it (imported here: the registry imports this module)
+    from model_registry import current_version, model_path_for
+    version = current_version()
+    predictor = VastuPredictor(model_path_for(version), version=version) if version else VastuPredictor()
+    
     try:
         # Read input from stdin
         input_data = json.loads(sys.stdin.read())
         
-        # Initialize predictor
-        predictor = VastuPredictor()
-        
         # Load model
         model_loaded = predictor.load_model()
         
@@ -137,7 +341,7 @@ def main():
             'vastu_score': 75,
             'confidence': 0.5,
             'model_type': 'Error',
-            'version': '1.0.0',
+            'version': predictor.version,
             'accuracy': 0.5,
             'processing_time': 0.1,
             'error': str(e)
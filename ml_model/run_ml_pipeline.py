@@ -50,6 +50,16 @@ def main():
         print("Model training failed")
         return
     
+    # Step 3b: Export flat forest for fast inference
+    print("\nExporting flat forest...")
+    if not run_command("python flat_forest.py", "Flat forest export"):
+        print("Flat forest export failed, predict.py will use the sklearn model")
+    
+    # Step 3c: Precompute lookup grid for standard inputs
+    print("\nBuilding prediction lookup grid...")
+    if not run_command("python lookup_grid.py", "Lookup grid build"):
+        print("Lookup grid build failed, predict.py will score every request with the model")
+    
     # Step 4: Test the model
     print("\nTesting ML model...")
     test_features = {
@@ -95,7 +105,9 @@ def main():
     files_to_check = [
         'vastu_dataset.csv',
         'vastu_processed.csv',
-        'vastu_ml_model.pkl'
+        'vastu_ml_model.pkl',
+        'vastu_ml_model.flat',
+        'vastu_ml_model.grid.npy'
     ]
     
     for file in files_to_check:
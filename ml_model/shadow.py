@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Vastu Vision Shadow Model Evaluation
+Scores live traffic with a candidate model on a background thread and
+records how it differs from the serving model, off the request path
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from predict import VastuPredictor
+
+SHADOW_MODEL_PATH = os.environ.get('VASTU_SHADOW_MODEL')
+SHADOW_LOG_PATH = os.environ.get('VASTU_SHADOW_LOG', str(Path(__file__).parent / 'shadow_log.jsonl'))
+
+class ShadowEvaluator:
+    """Background comparison of a candidate model against the primary one
+
+    submit() never blocks: when the queue is full the sample is dropped
+    and counted, so a slow candidate can't add latency to user requests.
+    """
+
+    def __init__(self, candidate_model_path, log_path=SHADOW_LOG_PATH, max_queue=1000):
+        self.candidate = VastuPredictor(candidate_model_path, cache_size=0)
+        self.loaded = self.candidate.load_model()
+        if getattr(self.candidate.model, 'n_jobs', None) is not None:
+            # One thread is plenty off the hot path; don't compete with request threads
+            self.candidate.model.n_jobs = 1
+        self.log_path = log_path
+        self.pending = queue.Queue(maxsize=max_queue)
+        self.lock = threading.Lock()
+        self.samples = 0
+        self.dropped = 0
+        self.total_abs_diff = 0.0
+        self.max_abs_diff = 0.0
+        self.total_primary_ms = 0.0
+        self.total_candidate_ms = 0.0
+        self.batches = 0
+        self.worker = threading.Thread(target=self.run, name='shadow-evaluator', daemon=True)
+        self.worker.start()
+
+    def submit(self, ml_inputs, primary_results, primary_ms):
+        """Hand a scored batch to the shadow worker without waiting"""
+        if not self.loaded:
+            return
+        try:
+            self.pending.put_nowait((ml_inputs, primary_results, primary_ms))
+        except queue.Full:
+            with self.lock:
+                self.dropped += 1
+
+    def run(self):
+        while True:
+            ml_inputs, primary_results, primary_ms = self.pending.get()
+            try:
+                self.evaluate(ml_inputs, primary_results, primary_ms)
+            except Exception as e:
+                print(f"⚠️ Shadow evaluation error: {e}")
+
+    def evaluate(self, ml_inputs, primary_results, primary_ms):
+        start = time.perf_counter()
+        candidate_results = self.candidate.predict_batch(ml_inputs)
+        candidate_ms = (time.perf_counter() - start) * 1000
+
+        diffs = [candidate['vastu_score'] - primary['vastu_score']
+                 for primary, candidate in zip(primary_results, candidate_results)]
+
+        with self.lock:
+            self.batches += 1
+            self.samples += len(diffs)
+            self.total_abs_diff += sum(abs(d) for d in diffs)
+            self.max_abs_diff = max([self.max_abs_diff] + [abs(d) for d in diffs])
+            self.total_primary_ms += primary_ms
+            self.total_candidate_ms += candidate_ms
+
+        if self.log_path:
+            with open(self.log_path, 'a') as log:
+                log.write(json.dumps({
+                    'time': time.time(),
+                    'primary_version': primary_results[0].get('version') if primary_results else None,
+                    'rows': len(diffs),
+                    'score_diffs': [round(d, 1) for d in diffs],
+                    'primary_ms': round(primary_ms, 3),
+                    'candidate_ms': round(candidate_ms, 3)
+                }) + '\n')
+
+    def stats(self):
+        with self.lock:
+            return {
+                'candidate': str(self.candidate.model_path),
+                'candidate_loaded': self.loaded,
+                'samples': self.samples,
+                'dropped': self.dropped,
+                'queued': self.pending.qsize(),
+                'mean_abs_diff': round(self.total_abs_diff / self.samples, 3) if self.samples else 0.0,
+                'max_abs_diff': round(self.max_abs_diff, 3),
+                'avg_primary_ms': round(self.total_primary_ms / self.batches, 3) if self.batches else 0.0,
+                'avg_candidate_ms': round(self.total_candidate_ms / self.batches, 3) if self.batches else 0.0
+            }
+
+def create_shadow_evaluator():
+    """ShadowEvaluator for $VASTU_SHADOW_MODEL, or None if shadow mode is off"""
+    if not SHADOW_MODEL_PATH:
+        return None
+    return ShadowEvaluator(SHADOW_MODEL_PATH)
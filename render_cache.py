@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Vastu Vision Render Cache
+Content-addressed cache of rendered PNG bytes with a memory LRU tier and
+an optional disk tier, shared by the analysis services. Cache keys double
+as the image ids served from GET /images/<id>.
+"""
+
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from flask import Response, jsonify, request
+
+from image_encoding import image_mimetype
+
+# Disk tier, so image URLs outlive a restart or memory eviction and are shared
+# by every worker on the host; VASTU_RENDER_CACHE_DIR='' turns it off
+RENDER_CACHE_DIR = os.environ.get('VASTU_RENDER_CACHE_DIR',
+                                  os.path.join(os.path.dirname(__file__) or '.', 'render_cache'))
+IMAGE_MAX_AGE = 365 * 24 * 3600  # ids are content hashes, so a URL never changes meaning
+
+class RenderCache:
+    """Maps a render key (e.g. elements, score, chart variant) to PNG bytes
+
+    pinned_dir is an optional second disk tier for deploy-time renders: it
+    is read like disk_dir but never trimmed, so live traffic can't evict it.
+    """
+
+    def __init__(self, max_entries=256, disk_dir=RENDER_CACHE_DIR, max_disk_entries=5000, pinned_dir=None):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.max_disk_entries = max_disk_entries
+        self.pinned_dir = Path(pinned_dir) if pinned_dir else None
+        for directory in (self.disk_dir, self.pinned_dir):
+            if directory:
+                directory.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(*parts):
+        """Content address for the render inputs"""
+        payload = json.dumps(parts, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            png = self.entries.get(key)
+            if png is not None:
+                self.entries.move_to_end(key)
+                self.memory_hits += 1
+                return png
+
+        png = self.read_disk(key)
+        with self.lock:
+            if png is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self.put_memory(key, png)
+        return png
+
+    def put(self, key, png):
+        self.put_memory(key, png)
+        self.write_disk(key, png)
+
+    def pin(self, key, png):
+        """Store in the pinned tier (falls back to put without one)"""
+        if not self.pinned_dir:
+            return self.put(key, png)
+        self.put_memory(key, png)
+        self.write_file(self.pinned_dir / f'{key}.png', png)
+
+    def is_pinned(self, key):
+        return bool(self.pinned_dir) and (self.pinned_dir / f'{key}.png').exists()
+
+    def put_many(self, items, pinned=False):
+        """Store a batch of {key: PNG bytes}, trimming the disk tier once at the end"""
+        for key, png in items.items():
+            if pinned and self.pinned_dir:
+                self.pin(key, png)
+                continue
+            self.put_memory(key, png)
+            self.write_disk(key, png, trim=False)
+        if self.disk_dir and not (pinned and self.pinned_dir):
+            self.trim_disk()
+
+    def put_memory(self, key, png):
+        with self.lock:
+            self.entries[key] = png
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_render(self, key_parts, render):
+        """Return cached PNG bytes for key_parts, calling render() on a miss"""
+        return self.get_or_render_key(self.make_key(*key_parts), render)
+
+    def get_or_render_key(self, key, render):
+        """Return cached PNG bytes for an already computed key"""
+        png = self.get(key)
+        if png is None:
+            png = render()
+            self.put(key, png)
+        return png
+
+    def image_response(self, image_id):
+        """Flask response serving a cached image by id, with caching headers"""
+        if not is_image_id(image_id):
+            return jsonify({'success': False, 'error': 'Invalid image id'}), 404
+
+        if request.if_none_match.contains(image_id):
+            response = Response(status=304)
+        else:
+            png = self.get(image_id)
+            if png is None:
+                return jsonify({'success': False, 'error': 'Image expired, please re-run the request'}), 404
+            response = Response(png, mimetype=image_mimetype(png))
+            response.content_length = len(png)
+        response.set_etag(image_id)
+        response.cache_control.public = True
+        response.cache_control.max_age = IMAGE_MAX_AGE
+        response.cache_control.immutable = True
+        return response
+
+    def read_disk(self, key):
+        if self.pinned_dir:
+            try:
+                return (self.pinned_dir / f'{key}.png').read_bytes()
+            except OSError:
+                pass
+        if not self.disk_dir:
+            return None
+        path = self.disk_dir / f'{key}.png'
+        try:
+            png = path.read_bytes()
+            os.utime(path)  # mtime tracks last use for disk eviction
+            return png
+        except OSError:
+            return None
+
+    def write_disk(self, key, png, trim=True):
+        if not self.disk_dir:
+            return
+        if self.write_file(self.disk_dir / f'{key}.png', png) and trim:
+            self.trim_disk()
+
+    def write_file(self, path, png):
+        tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        try:
+            tmp_path.write_bytes(png)
+            os.replace(tmp_path, path)
+            return True
+        except OSError as e:
+            print(f"⚠️ Render cache disk write failed: {e}")
+            return False
+
+    def trim_disk(self):
+        files = list(self.disk_dir.glob('*.png'))
+        if len(files) <= self.max_disk_entries:
+            return
+        files.sort(key=lambda p: p.stat().st_mtime)
+        for path in files[:len(files) - self.max_disk_entries]:
+            try:
+                path.unlink()
+                with self.lock:
+                    self.evictions += 1
+            except OSError:
+                pass
+
+    def stats(self):
+        with self.lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'disk_dir': str(self.disk_dir) if self.disk_dir else None,
+                'pinned_dir': str(self.pinned_dir) if self.pinned_dir else None,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0
+            }
+
+def is_image_id(value):
+    """True for a well-formed image id (a render cache key)"""
+    return len(value) == 64 and all(c in '0123456789abcdef' for c in value)
+
+def wants_inline_images(data):
+    """Compatibility flag: {"inline_images": true} or ?inline=1 returns base64 PNGs in the JSON"""
+    if request.args.get('inline') in ('1', 'true'):
+        return True
+    return bool((data or {}).get('inline_images'))
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Vastu Vision Render Pool
+Runs matplotlib rendering in pre-spawned worker processes so a slow
+render never holds the Flask process's GIL
+"""
+
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, Future, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from admission import Overloaded
+
+RENDER_WORKERS = int(os.environ.get('VASTU_RENDER_WORKERS', 2))  # 0 renders in-process
+RENDER_QUEUE_DEPTH = int(os.environ.get('VASTU_RENDER_QUEUE', 16))
+RENDER_MAX_TASKS = int(os.environ.get('VASTU_RENDER_MAX_TASKS', 200))  # per worker, then recycle
+RENDER_TIMEOUT = float(os.environ.get('VASTU_RENDER_TIMEOUT', 30))  # seconds a caller waits for one render
+
+class RenderQueueFull(Overloaded):
+    """Raised when the render pool already has queue_depth jobs outstanding"""
+
+def warm_worker():
+    """Worker initializer: import matplotlib and render once so fonts are loaded"""
+    import chart_renderer
+    chart_renderer.render_chart('5 Elements Analysis', {}, 0)
+
+def pool_context():
+    """Start method for render workers
+
+    The services run model-watcher, ML and request threads, and forking a
+    threaded process can hand the child a lock some other thread held.
+    forkserver forks every worker (including recycled pools) from a clean
+    single-threaded server that has matplotlib preloaded, so workers still
+    start warm. Like spawn, each worker imports the service's main module,
+    so services keep thread-starting code under __main__.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(['chart_renderer'])
+        return context
+    return multiprocessing.get_context('spawn')
+
+class RenderPool:
+    """Bounded pool of render worker processes
+
+    After workers * max_tasks renders the whole pool is replaced with fresh
+    processes to contain matplotlib memory growth; jobs already running on
+    the old pool finish there. A pool whose worker dies is replaced as soon
+    as the failed job reports back.
+    """
+
+    def __init__(self, workers=RENDER_WORKERS, queue_depth=RENDER_QUEUE_DEPTH,
+                 max_tasks=RENDER_MAX_TASKS):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.max_tasks = max_tasks
+        self.slots = threading.BoundedSemaphore(queue_depth)
+        self.lock = threading.Lock()
+        self.executor = None
+        self.generation_tasks = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.recycles = 0
+        self.broken = 0
+        self.timed_out = 0
+        self.outstanding = 0
+
+    def new_executor(self):
+        executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=pool_context(),
+                                       initializer=warm_worker)
+        # Start every worker now rather than on the first requests
+        for _ in range(self.workers):
+            executor.submit(int)
+        return executor
+
+    def start(self):
+        if self.workers > 0:
+            with self.lock:
+                if self.executor is None:
+                    self.executor = self.new_executor()
+        return self
+
+    def get_executor(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = self.new_executor()
+            elif self.generation_tasks >= self.workers * self.max_tasks:
+                old_executor = self.executor
+                self.executor = self.new_executor()
+                self.generation_tasks = 0
+                self.recycles += 1
+                old_executor.shutdown(wait=False)
+            self.generation_tasks += 1
+            return self.executor
+
+    def submit(self, fn, *args):
+        """Queue fn(*args) on a worker; raises RenderQueueFull when the queue is full"""
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            raise RenderQueueFull('render_pool', message=f"{self.queue_depth} renders already queued")
+
+        with self.lock:
+            self.submitted += 1
+            self.outstanding += 1
+
+        if self.workers <= 0:
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            self.release()
+            return future
+
+        executor = None
+        try:
+            executor = self.get_executor()
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool for the next job
+            self.discard(executor)
+            self.release()
+            raise
+        except Exception:
+            self.release()
+            raise
+        future.add_done_callback(lambda done: self.finished(done, executor))
+        return future
+
+    def finished(self, future, executor):
+        self.release()
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            # The worker died mid-render: replace the pool now rather than on the next submit
+            self.discard(executor)
+
+    def discard(self, executor):
+        """Drop a broken executor so the next submit starts a fresh pool"""
+        with self.lock:
+            if executor is not None and self.executor is executor:
+                self.executor = None
+                self.generation_tasks = 0
+                self.broken += 1
+
+    def release(self):
+        with self.lock:
+            self.outstanding -= 1
+        self.slots.release()
+
+    def render(self, fn, *args, timeout=RENDER_TIMEOUT):
+        """Run fn(*args) on a worker and wait for its result; raises TimeoutError
+        rather than blocking the caller on a hung worker"""
+        future = self.submit(fn, *args)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            with self.lock:
+                self.timed_out += 1
+            raise
+
+    def stats(self):
+        with self.lock:
+            return {
+                'workers': self.workers,
+                'queue_depth': self.queue_depth,
+                'outstanding': self.outstanding,
+                'queued': max(0, self.outstanding - max(self.workers, 1)),
+                'submitted': self.submitted,
+                'rejected': self.rejected,
+                'recycles': self.recycles,
+                'broken': self.broken,
+                'timed_out': self.timed_out,
+                'max_tasks_per_worker': self.max_tasks
+            }
+
+def stress_test(threads=8, renders=4):
+    """Render charts and blueprints from many threads at once and check the
+    PNGs match a sequential render byte for byte"""
+    import time
+    import chart_renderer
+    import generate_blueprints
+
+    rooms = [{'name': 'Living Room', 'zone': 'NE'}, {'name': 'Kitchen', 'zone': 'SE'},
+             {'name': 'Master Bedroom', 'zone': 'SW'}, {'name': 'Bathroom', 'zone': 'W'}]
+    jobs = []
+    for i in range(renders):
+        elements = {name: 40 + (i * 7 + j * 11) % 60 for j, name in enumerate(chart_renderer.ELEMENT_NAMES)}
+        jobs.append((chart_renderer.render_chart, ('5 Elements Analysis', elements, 50 + i)))
+        jobs.append((generate_blueprints.render_complete_blueprint, (rooms, 30 + i, 40, 'optimal')))
+
+    expected = [fn(*args) for fn, args in jobs]
+
+    from concurrent.futures import ThreadPoolExecutor
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(lambda job: job[0](*job[1]), jobs * threads))
+    elapsed = time.perf_counter() - start
+
+    mismatches = sum(result != expected[i % len(jobs)] for i, result in enumerate(results))
+    print(f"{len(results)} renders on {threads} threads in {elapsed:.1f}s, {mismatches} mismatches")
+    return mismatches == 0
+
+if __name__ == '__main__':
+    import sys
+    ok = stress_test(*(int(arg) for arg in sys.argv[1:3]))
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Vastu Vision Single-Flight Requests
+Concurrent identical requests (double clicks, dashboard re-renders) share
+one computation: the first runs the view, the rest wait for its response
+"""
+
+import json
+import hashlib
+import functools
+import threading
+from flask import Response, current_app, request
+
+class SingleFlight:
+    """Runs fn once per key among concurrent callers and hands everyone its result"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self.lock:
+            call = self.calls.get(key)
+            if call is None:
+                call = self.calls[key] = {'done': threading.Event(), 'result': None, 'error': None}
+                self.leaders += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            call['done'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+
+        try:
+            call['result'] = fn()
+            return call['result']
+        except Exception as e:
+            call['error'] = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call['done'].set()
+
+    def stats(self):
+        with self.lock:
+            total = self.leaders + self.coalesced
+            return {
+                'in_flight': len(self.calls),
+                'executed': self.leaders,
+                'coalesced': self.coalesced,
+                'coalesced_rate': round(self.coalesced / total, 3) if total else 0.0
+            }
+
+def request_key():
+    """Key for the current request: path, normalized JSON body, query string and deadline header"""
+    data = request.get_json(silent=True)
+    body = json.dumps(data, sort_keys=True, separators=(',', ':')) if data is not None \
+        else request.get_data(as_text=True)
+    payload = json.dumps([request.path, body, sorted(request.args.items(multi=True)),
+                          request.headers.get('X-Request-Deadline-Ms')])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def coalesce(flight):
+    """View decorator: identical concurrent POSTs share one response (place below @app.route)"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'POST':
+                return view(*args, **kwargs)
+
+            def run():
+                response = current_app.make_response(view(*args, **kwargs))
+                # Plain data so each waiting request builds its own Response
+                return response.get_data(), response.status_code, list(response.headers.items())
+
+            body, status, headers = flight.do(request_key(), run)
+            return Response(body, status=status, headers=headers)
+        return wrapper
+    return decorator
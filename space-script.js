@@ -203,6 +203,11 @@ async function handleFormSubmission(event) {
             const result = await response.json();
             
             if (result.success) {
+                // Image URLs are relative to the analysis server
+                if (result.visualization_url && result.visualization_url.startsWith('/')) {
+                    result.visualization_url = 'http://localhost:5000' + result.visualization_url;
+                }
+                
                 // Save results to localStorage
                 localStorage.setItem('vastuResults', JSON.stringify(result));
                 
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Vastu Vision Tile Pyramid
+Cuts a rendered image into a small thumbnail plus fixed-size tiles at each
+zoom level, so clients fetch only the resolution and region they display
+"""
+
+import io
+import os
+import math
+import time
+from PIL import Image
+
+from image_encoding import encode_image, IMAGE_FORMAT, PALETTE_COLORS
+
+TILE_SIZE = int(os.environ.get('VASTU_TILE_SIZE', 256))  # px per tile side
+THUMBNAIL_SIZE = int(os.environ.get('VASTU_THUMBNAIL_SIZE', 320))  # px, longest side
+
+def pyramid_info(width, height, tile_size=TILE_SIZE):
+    """Zoom levels for a full-size image: level 0 fits in one tile, max_zoom is full resolution"""
+    max_zoom = max(0, math.ceil(math.log2(max(width, height) / tile_size)))
+    levels = []
+    for zoom in range(max_zoom + 1):
+        scale = 2 ** (max_zoom - zoom)
+        level_width, level_height = max(1, math.ceil(width / scale)), max(1, math.ceil(height / scale))
+        levels.append({
+            'zoom': zoom,
+            'width': level_width,
+            'height': level_height,
+            'columns': math.ceil(level_width / tile_size),
+            'rows': math.ceil(level_height / tile_size)
+        })
+    return {'width': width, 'height': height, 'tile_size': tile_size, 'max_zoom': max_zoom, 'levels': levels}
+
+def image_size(data):
+    """(width, height) of encoded image bytes, read from the header only"""
+    with Image.open(io.BytesIO(data)) as image:
+        return image.size
+
+def build_pyramid(image, image_format=IMAGE_FORMAT, tile_size=TILE_SIZE):
+    """Thumbnail and tiles for an RGB image; returns (pyramid info, {'thumbnail' or (zoom, x, y): bytes})"""
+    info = pyramid_info(image.width, image.height, tile_size)
+
+    thumbnail = image.copy()
+    thumbnail.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.Resampling.LANCZOS)
+    parts = {'thumbnail': encode_image(thumbnail, image_format)}
+
+    # Walk down from full resolution; each level is a 2x2 box average of the one above
+    level_image = image
+    for level in reversed(info['levels']):
+        if level['zoom'] < info['max_zoom']:
+            level_image = level_image.reduce(2)
+        # Quantize the whole level once; crops keep its palette
+        source = level_image
+        if image_format == 'png':
+            source = level_image.quantize(colors=PALETTE_COLORS, method=Image.Quantize.FASTOCTREE,
+                                          dither=Image.Dither.NONE)
+        for y in range(level['rows']):
+            for x in range(level['columns']):
+                box = (x * tile_size, y * tile_size,
+                       min((x + 1) * tile_size, level['width']), min((y + 1) * tile_size, level['height']))
+                parts[(level['zoom'], x, y)] = encode_image(source.crop(box), image_format)
+    return info, parts
+
+def build_pyramid_from_bytes(data, image_format=IMAGE_FORMAT):
+    """Pyramid for an already encoded image, e.g. one stored before it was tiled"""
+    with Image.open(io.BytesIO(data)) as image:
+        return build_pyramid(image.convert('RGB'), image_format)
+
+def report():
+    """Build the pyramid for a standard blueprint and compare what a card view and a zoomed view download"""
+    import generate_blueprints
+    from image_encoding import figure_to_image
+
+    fig = generate_blueprints.build_blueprint_figure([], 34, 35, 'optimal')
+    image = figure_to_image(fig, generate_blueprints.BLUEPRINT_DPI, 'tight', generate_blueprints.BLUEPRINT_BACKGROUND)
+    full = encode_image(image)
+
+    start = time.perf_counter()
+    info, parts = build_pyramid(image)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    tiles = {part: data for part, data in parts.items() if part != 'thumbnail'}
+    print("Vastu Vision Tile Pyramid")
+    print("=" * 70)
+    print(f"full image: {info['width']}x{info['height']} px, {len(full) / 1024:.0f} KB")
+    print(f"pyramid: {len(tiles)} tiles over {info['max_zoom'] + 1} levels, "
+          f"{sum(map(len, tiles.values())) / 1024:.0f} KB, built in {elapsed_ms:.0f} ms")
+    print(f"card view (thumbnail): {len(parts['thumbnail']) / 1024:.1f} KB")
+    for level in info['levels']:
+        level_bytes = sum(len(data) for (zoom, _, _), data in tiles.items() if zoom == level['zoom'])
+        print(f"  zoom {level['zoom']}: {level['columns']}x{level['rows']} tiles, {level_bytes / 1024:.0f} KB")
+
+if __name__ == '__main__':
+    report()